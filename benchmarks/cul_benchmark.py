@@ -0,0 +1,74 @@
+"""Benchmark of the TX path of `Cul` against the fake CUL, without Home Assistant.
+
+For every cover count a burst of one frame per cover is queued at once.
+Measured are the times from queueing until the simulated radio of the fake
+CUL has sent the frame, the frames sent per second and the time the event
+loop was blocked. The radio sends about 7 frames per second, so the
+bursts of many covers take a while, and frames still queued after the
+command expiry of 30 s are dropped.
+
+Run from the repository root (Linux only, needs a pseudo terminal):
+
+    python benchmarks/cul_benchmark.py
+"""
+
+import asyncio
+import logging
+
+from fake_cul import FakeCul
+from harness import COVER_COUNTS, LoopLagMonitor, load_module, percentiles, report
+
+BAUD_RATE = 38400
+
+
+async def run_burst(cul, fake, encoders) -> None:
+    """Queue one frame per encoder and report once all were sent or dropped."""
+    loop = asyncio.get_running_loop()
+    received = len(fake.received)
+    monitor = LoopLagMonitor()
+    monitor.start()
+
+    start = loop.time()
+    await asyncio.gather(
+        *(cul.async_send_command(encoder.encode(1, 0x2, 1)) for encoder in encoders)
+    )
+    await fake.async_wait_idle()
+    await monitor.stop()
+
+    latencies = [t - start for t in fake.completed[received:]]
+    report(
+        f"{len(encoders)} covers",
+        {
+            **percentiles(latencies),
+            "sent": len(latencies),
+            "frames/s": len(latencies) / max(latencies),
+            "blocked": monitor.blocked,
+        },
+    )
+
+
+async def main() -> None:
+    """Run the bursts for all cover counts."""
+    # Dropped frames are counted, not logged one by one
+    logging.basicConfig(level=logging.ERROR)
+    codec = load_module("codec")
+    cul_module = load_module("cul")
+    governor = load_module("governor")
+
+    fake = FakeCul(echo=False)
+    fake.start()
+    cul = cul_module.Cul(fake.port, BAUD_RATE)
+    # The fake CUL has no duty cycle, measure the TX path without the limit
+    cul.governor = governor.AirtimeGovernor(100)
+    try:
+        assert await cul.async_connect(), "could not open the fake CUL"
+        for count in COVER_COUNTS:
+            encoders = [codec.FrameEncoder(f"{i:06X}") for i in range(count)]
+            await run_burst(cul, fake, encoders)
+    finally:
+        await cul.async_close()
+        fake.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
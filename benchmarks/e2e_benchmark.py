@@ -0,0 +1,143 @@
+"""End-to-end benchmark of covers driven through Home Assistant and the fake CUL.
+
+Sets up the integration with 1, 10, 100 and 500 covers in Home Assistant's
+test harness and calls the cover services for all of them at once. The
+first round runs on a fresh state file (rolling code blocks are reserved),
+the second one on reserved blocks. Measured are the times from the service
+call until the simulated radio of the fake CUL has sent the frames, the
+frames per second, the time the event loop was blocked and the bytes of
+state file written per command. The radio sends about 7 frames per second,
+so the rounds of many covers take a while, and frames still queued after
+the command expiry of 30 s are dropped.
+
+Needs the packages of requirements_test.txt, run from the repository root
+(Linux only, needs a pseudo terminal):
+
+    pip install -r requirements_test.txt
+    python -m pytest benchmarks/e2e_benchmark.py -s -o asyncio_mode=auto
+"""
+
+import asyncio
+from pathlib import Path
+import sys
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from custom_components.somfy_cul.const import DATA_STATE_STORE, DOMAIN  # noqa: E402
+from custom_components.somfy_cul.store import SomfyStateStore  # noqa: E402
+from fake_cul import FakeCul  # noqa: E402
+from harness import COVER_COUNTS, LoopLagMonitor, percentiles, report  # noqa: E402
+
+BAUD_RATE = 38400
+TRAVEL_TIME = 30
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Enable the integration of this repository."""
+    return
+
+
+@pytest.fixture
+async def fake_cul():
+    """Return a fake CUL serving on the event loop of the test."""
+    cul = FakeCul(echo=False)
+    cul.start()
+    yield cul
+    cul.stop()
+
+
+@pytest.fixture
+def bytes_written(monkeypatch):
+    """Count the bytes written to the state file."""
+    written = [0]
+    dump = SomfyStateStore._dump
+
+    def counting_dump(self, data):
+        content = dump(self, data)
+        written[0] += len(content.encode())
+        return content
+
+    monkeypatch.setattr(SomfyStateStore, "_dump", counting_dump)
+    return written
+
+
+async def run_round(hass, fake_cul, bytes_written, service, count, title) -> None:
+    """Call `service` for all covers and report once all frames were sent or dropped."""
+    loop = asyncio.get_running_loop()
+    store = hass.data[DOMAIN][DATA_STATE_STORE]
+    await store.async_flush()
+    received = len(fake_cul.received)
+    written = bytes_written[0]
+    monitor = LoopLagMonitor()
+    monitor.start()
+
+    start = loop.time()
+    await hass.services.async_call(
+        "cover", service, {"entity_id": "all"}, blocking=True
+    )
+    await fake_cul.async_wait_idle()
+    await monitor.stop()
+    await store.async_flush()
+
+    latencies = [t - start for t in fake_cul.completed[received:]]
+    report(
+        f"{count} covers, {title}",
+        {
+            **percentiles(latencies),
+            "sent": len(latencies),
+            "frames/s": len(latencies) / max(latencies),
+            "blocked": monitor.blocked,
+            "bytes/command": (bytes_written[0] - written) / count,
+        },
+    )
+
+
+@pytest.mark.parametrize("expected_lingering_timers", [True])
+@pytest.mark.parametrize("expected_lingering_tasks", [True])
+@pytest.mark.parametrize("count", COVER_COUNTS)
+async def test_covers(hass: HomeAssistant, fake_cul, bytes_written, count: int) -> None:
+    """Open and close `count` covers."""
+    assert await async_setup_component(
+        hass,
+        DOMAIN,
+        {
+            DOMAIN: {
+                "cul_path": fake_cul.port,
+                "baud_rate": BAUD_RATE,
+                # The fake CUL has no duty cycle limit
+                "duty_cycle": 100,
+            }
+        },
+    )
+    assert await async_setup_component(
+        hass,
+        "cover",
+        {
+            "cover": [
+                {
+                    "platform": DOMAIN,
+                    "covers": [
+                        {
+                            "name": f"Cover {i}",
+                            "address": f"{i + 1:06X}",
+                            "up_time": TRAVEL_TIME,
+                            "down_time": TRAVEL_TIME,
+                        }
+                        for i in range(count)
+                    ],
+                }
+            ]
+        },
+    )
+    await hass.async_block_till_done()
+    assert len(hass.states.async_entity_ids("cover")) == count
+
+    await run_round(hass, fake_cul, bytes_written, "open_cover", count, "fresh")
+    await run_round(hass, fake_cul, bytes_written, "close_cover", count, "reserved")
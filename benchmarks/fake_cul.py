@@ -0,0 +1,179 @@
+"""culfw stand-in on a Linux pseudo terminal.
+
+Speaks enough of the culfw protocol for the integration: `V` answers the
+version, `Yr<n>` sets the number of frame repetitions and `Ys...` frames
+are "sent": they occupy the simulated radio for their airtime, are recorded
+with the loop time they arrived and the time the radio finished them, and
+are echoed back as if another CUL had received them. Lines can be injected
+to simulate frames of remotes.
+
+With `tcp=True` it listens on a local TCP port instead, like a CUL on a
+ser2net server, and `port` is its tcp:// URL.
+
+Run standalone to get a device for manual tests:
+
+    python benchmarks/fake_cul.py [--tcp]
+"""
+
+import asyncio
+import os
+import pty
+import socket
+import sys
+import tty
+
+VERSION = "V 1.67 CUL868 (fake)"
+# Airtime of one Somfy RTS frame without repetitions, as the integration
+# models it: 0.14 s with the 6 repetitions of culfw
+FRAME_AIRTIME = 0.02
+# Time a line written by the integration may take to arrive here
+TRANSIT_TIME = 0.01
+
+
+class FakeCul:
+    """culfw stand-in, the device path or URL to open is `port`."""
+
+    def __init__(self, airtime=FRAME_AIRTIME, echo=True, tcp=False) -> None:
+        """Open the pseudo terminal, or the listening socket with `tcp`."""
+        self._master = self._slave = None
+        self._socket: socket.socket | None = None
+        if tcp:
+            self._socket = socket.create_server(("127.0.0.1", 0))
+            self.port = f"tcp://127.0.0.1:{self._socket.getsockname()[1]}"
+        else:
+            self._master, self._slave = pty.openpty()
+            tty.setraw(self._master)
+            tty.setraw(self._slave)
+            self.port = os.ttyname(self._slave)
+        self._server: asyncio.Server | None = None
+        self._client: asyncio.StreamWriter | None = None
+
+        self.airtime = airtime
+        self.echo = echo
+        self.repetitions = 6
+        self.received: list[tuple[float, str]] = []
+        # Loop times the radio finished sending the frames in `received`
+        self.completed: list[float] = []
+        self.bytes_received = 0
+        self._buffer = bytearray()
+        self._busy_until = 0.0
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def start(self) -> None:
+        """Start serving on the running loop."""
+        self._loop = asyncio.get_running_loop()
+        if self._socket is not None:
+            # The socket listens already, clients wait until the server accepts
+            self._loop.create_task(self._async_serve())
+        else:
+            self._loop.add_reader(self._master, self._on_readable)
+
+    def stop(self) -> None:
+        """Stop serving and close the pseudo terminal or the socket."""
+        if self._socket is not None:
+            self.disconnect()
+            if self._server is not None:
+                self._server.close()
+            self._socket.close()
+            return
+        if self._loop is not None:
+            self._loop.remove_reader(self._master)
+        os.close(self._master)
+        os.close(self._slave)
+
+    def disconnect(self) -> None:
+        """Drop the TCP connection of the integration, as a network failure would."""
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    def inject(self, line: str) -> None:
+        """Send a line to the integration, e.g. a frame of a remote."""
+        data = line.encode() + b"\r\n"
+        if self._socket is None:
+            os.write(self._master, data)
+        elif self._client is not None:
+            self._client.write(data)
+
+    async def _async_serve(self) -> None:
+        self._server = await asyncio.start_server(self._async_client, sock=self._socket)
+
+    async def _async_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serve one connection, a new one replaces the former."""
+        self.disconnect()
+        self._client = writer
+        try:
+            while data := await reader.read(4096):
+                self._on_data(data)
+        except ConnectionError:
+            pass
+        finally:
+            if self._client is writer:
+                self._client = None
+            writer.close()
+
+    @property
+    def busy_until(self) -> float:
+        """Return the loop time the radio has sent all frames received so far."""
+        return self._busy_until
+
+    async def async_wait_idle(self) -> None:
+        """Wait until the radio has sent all frames, also those still in transit."""
+        loop = asyncio.get_running_loop()
+        await asyncio.sleep(TRANSIT_TIME)
+        # A frame arriving meanwhile keeps the radio busy for its airtime
+        while (busy := self._busy_until - loop.time()) > 0:
+            await asyncio.sleep(busy)
+
+    def frame_airtime(self) -> float:
+        """Return the airtime of one frame including its repetitions."""
+        return self.airtime * (1 + self.repetitions)
+
+    def _on_readable(self) -> None:
+        try:
+            data = os.read(self._master, 4096)
+        except OSError:
+            return
+        self._on_data(data)
+
+    def _on_data(self, data: bytes) -> None:
+        self.bytes_received += len(data)
+        self._buffer += data
+        while (end := self._buffer.find(b"\n")) >= 0:
+            line = self._buffer[:end].decode().strip()
+            del self._buffer[: end + 1]
+            if line:
+                self._handle(line)
+
+    def _handle(self, line: str) -> None:
+        now = self._loop.time()
+        if line == "V":
+            self.inject(VERSION)
+        elif line.startswith("Yr"):
+            self.repetitions = int(line[2:] or 0)
+        elif line.startswith("Ys"):
+            self.received.append((now, line))
+            # The radio sends one frame after the other
+            self._busy_until = max(now, self._busy_until) + self.frame_airtime()
+            self.completed.append(self._busy_until)
+            if self.echo:
+                frame = line[2:]
+                # culfw reports received addresses in reverse byte order
+                echo = "Ys" + frame[:8] + frame[12:14] + frame[10:12] + frame[8:10]
+                self._loop.call_at(self._busy_until, self.inject, echo)
+
+
+async def _main() -> None:
+    cul = FakeCul(tcp="--tcp" in sys.argv)
+    cul.start()
+    print(f"Fake CUL listening on {cul.port}")  # noqa: T201
+    try:
+        await asyncio.Event().wait()
+    finally:
+        cul.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,89 @@
+"""Measurement helpers shared by the benchmarks."""
+
+import asyncio
+import importlib
+from pathlib import Path
+import sys
+import types
+
+INTEGRATION_PATH = Path(__file__).parent.parent / "custom_components/somfy_cul"
+
+# Cover counts every end-to-end benchmark is run with
+COVER_COUNTS = (1, 10, 100, 500)
+
+
+def load_module(name):
+    """Load a module of the integration without its __init__ (and Home Assistant).
+
+    Only works for modules that do not import Home Assistant themselves,
+    like `cul` or `codec`.
+    """
+    if "somfy_cul" not in sys.modules:
+        package = types.ModuleType("somfy_cul")
+        package.__path__ = [str(INTEGRATION_PATH)]
+        sys.modules["somfy_cul"] = package
+    return importlib.import_module(f"somfy_cul.{name}")
+
+
+def percentiles(values, points=(50, 90, 99)) -> dict[str, float]:
+    """Return the nearest-rank percentiles of `values` and their maximum."""
+    ordered = sorted(values)
+    if not ordered:
+        return {}
+    result = {
+        f"p{p}": ordered[min(len(ordered) - 1, len(ordered) * p // 100)] for p in points
+    }
+    result["max"] = ordered[-1]
+    return result
+
+
+class LoopLagMonitor:
+    """Measure how long the event loop is blocked.
+
+    A task sleeps `interval` seconds over and over; every wake-up that is
+    later than `threshold` counts as blocking time.
+    """
+
+    def __init__(self, interval=0.001, threshold=0.002) -> None:
+        """Initialize the monitor."""
+        self.interval = interval
+        self.threshold = threshold
+        self.blocked = 0.0
+        self.max_lag = 0.0
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start measuring on the running loop."""
+        self.blocked = self.max_lag = 0.0
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop measuring."""
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = loop.time() - expected
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.threshold:
+                self.blocked += lag
+
+
+def report(title, results: dict) -> None:
+    """Print one line of results, times in milliseconds, counts as integers."""
+    values = ", ".join(
+        f"{key} {value * 1000:.2f} ms"
+        if key.startswith(("p", "max", "blocked", "lag"))
+        else f"{key} {value}"
+        if isinstance(value, int)
+        else f"{key} {value:.1f}"
+        for key, value in results.items()
+    )
+    print(f"{title:<28} {values}")  # noqa: T201
@@ -3,100 +3,301 @@
 from __future__ import annotations
 
 import logging
-import os
 from typing import Any
 
-import serial
 import voluptuous as vol
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    EVENT_HOMEASSISTANT_FINAL_WRITE,
+    EVENT_HOMEASSISTANT_STOP,
+    Platform,
+)
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
 import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.discovery import async_load_platform
 from homeassistant.helpers.typing import ConfigType
 
-from .const import CONF_BAUD_RATE, CONF_CUL_PATH, DATA_SOMFY_CUL, DOMAIN
-from .cul import Cul
+from .codec import SomfyFrame
+from .const import (
+    CONF_BAUD_RATE,
+    CONF_CUL_PATH,
+    CONF_DEVICES,
+    CONF_DUTY_CYCLE,
+    CONF_METRICS,
+    CONF_NAME,
+    CONF_POSITION_UPDATE_INTERVAL,
+    CONF_REPETITIONS,
+    CONF_STATE_FORMAT,
+    CONF_TRACE_SIZE,
+    DATA_METRICS,
+    DATA_POSITION_PUBLISHER,
+    DATA_REMOTES,
+    DATA_SOMFY_CUL,
+    DATA_STATE_STORE,
+    DATA_TRACE,
+    DEFAULT_CUL,
+    DOMAIN,
+    EVENT_REMOTE_COMMAND,
+    REPETITIONS_SCHEMA,
+    SERVICE_DUMP_DIAGNOSTICS,
+    SERVICE_DUMP_TRACE,
+    STATE_FILE,
+)
+from .cul import Cul, Priority
+from .governor import DEFAULT_DUTY_CYCLE, AirtimeGovernor
+from .metrics import Metrics
+from .position import PositionPublisher
+from .router import CulPool
+from .store import FORMAT_JSON, FORMAT_YAML, SomfyStateStore
+from .trace import DEFAULT_TRACE_SIZE, FrameTrace
 
 _LOGGER = logging.getLogger(__name__)
 
-PLATFORMS: list[Platform] = [Platform.COVER]
+DEVICE_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_NAME): cv.string,
+        vol.Required(CONF_CUL_PATH): cv.string,
+        vol.Optional(CONF_BAUD_RATE, default=38400): vol.Coerce(int),
+    }
+)
 
 CONFIG_SCHEMA = vol.Schema(
     {
         DOMAIN: {
             vol.Optional(CONF_CUL_PATH, default="/dev/ttyAMA0"): cv.string,
             vol.Optional(CONF_BAUD_RATE, default=38400): vol.Coerce(int),
+            vol.Optional(CONF_DEVICES): vol.All(cv.ensure_list, [DEVICE_SCHEMA]),
+            vol.Optional(CONF_STATE_FORMAT, default=FORMAT_YAML): vol.In(
+                [FORMAT_YAML, FORMAT_JSON]
+            ),
+            vol.Optional(CONF_POSITION_UPDATE_INTERVAL, default=1.0): vol.All(
+                vol.Coerce(float), vol.Range(min=0)
+            ),
+            vol.Optional(CONF_METRICS, default=False): cv.boolean,
+            vol.Optional(CONF_TRACE_SIZE, default=DEFAULT_TRACE_SIZE): vol.All(
+                vol.Coerce(int), vol.Range(min=0)
+            ),
+            vol.Optional(CONF_DUTY_CYCLE, default=DEFAULT_DUTY_CYCLE): vol.All(
+                vol.Coerce(float), vol.Range(min=0.1, max=100)
+            ),
+            vol.Optional(CONF_REPETITIONS, default={}): REPETITIONS_SCHEMA,
         }
     },
     extra=vol.ALLOW_EXTRA,
 )
 
 
-async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
-    """Validate the user input allows us to connect.
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the SOMFY CUL component from configuration.yaml."""
+    if (conf := config.get(DOMAIN)) is None:
+        # Set up from a config entry, if there is one
+        return True
+
+    await _async_setup_hub(hass, conf, config)
+    return True
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Set up the SOMFY CUL component from a config entry."""
+    if DOMAIN in hass.data:
+        _LOGGER.error(
+            "SOMFY CUL is already set up from configuration.yaml, "
+            "remove the somfy_cul section or the config entry"
+        )
+        return False
+
+    # The entry cannot be unloaded: the covers of configuration.yaml keep
+    # the devices and the store of the hub until Home Assistant stops
+    conf = CONFIG_SCHEMA({DOMAIN: dict(entry.data)})[DOMAIN]
+    await _async_setup_hub(hass, conf, {})
+    return True
 
-    Data has the keys from STEP_USER_DATA_SCHEMA with values provided by the user.
+
+async def _async_setup_hub(
+    hass: HomeAssistant, conf: ConfigType, config: ConfigType
+) -> None:
+    """Create the CUL devices, the state store and the services.
+
+    The devices are opened in the background, so startup and the setup of
+    the covers do not wait for them.
     """
+    # Several CUL devices can be configured as `devices`, otherwise there is one
+    devices = conf.get(CONF_DEVICES) or [
+        {
+            CONF_NAME: DEFAULT_CUL,
+            CONF_CUL_PATH: conf[CONF_CUL_PATH],
+            CONF_BAUD_RATE: conf.get(CONF_BAUD_RATE, 38400),
+        }
+    ]
+    # Frames received by several devices are handled once
+    rx_history: dict = {}
+    culs = {}
 
-    return True, None
+    # Create API instances
+    # A device not available yet is opened as soon as it appears
+    for device in devices:
+        culs[device[CONF_NAME]] = Cul(
+            device[CONF_CUL_PATH],
+            int(device[CONF_BAUD_RATE]),
+            name=device[CONF_NAME],
+            rx_history=rx_history,
+        )
+    pool = CulPool(culs)
 
-    if os.path.exists(data[CONF_CUL_PATH]):
-        if os.access(data[CONF_CUL_PATH], os.R_OK | os.W_OK):
-            # Return info that you want to store in the config entry.
+    # Every device has its own duty cycle
+    duty_cycle = conf.get(CONF_DUTY_CYCLE, DEFAULT_DUTY_CYCLE)
+    for cul in pool:
+        cul.governor = AirtimeGovernor(duty_cycle, now=hass.loop.time())
+        cul.repetitions.update(conf.get(CONF_REPETITIONS, {}))
 
-            try:
-                with serial.Serial(
-                    data[CONF_CUL_PATH], data[CONF_BAUD_RATE], timeout=1
-                ) as ser:
-                    return True, None
-            except serial.SerialException as e:
-                return False, f"Failed to open {data[CONF_CUL_PATH]}: {e}"
+    store = SomfyStateStore(
+        hass, hass.config.path(STATE_FILE), conf.get(CONF_STATE_FORMAT, FORMAT_YAML)
+    )
+    # Load the state of all covers once, before they are added
+    await hass.async_add_executor_job(store.load)
 
-        else:
-            return (
-                False,
-                f"Device {data[CONF_CUL_PATH]} exists but does not have read/write permissions.",
-            )
-    else:
-        return False, f"Device {data[CONF_CUL_PATH]} does not exist."
+    publisher = PositionPublisher(hass, conf.get(CONF_POSITION_UPDATE_INTERVAL, 1.0))
 
+    # Covers by the addresses of their remotes, filled when they are added
+    remotes: dict[str, list] = {}
 
-def setup(hass: HomeAssistant, config: ConfigType) -> bool:
-    """Set up the SOMFY CUL component."""
+    metrics = None
+    if conf.get(CONF_METRICS, False):
+        metrics = Metrics()
+        store.metrics = metrics
+        for cul in pool:
+            cul.metrics = metrics
 
-    conf = config.get(DOMAIN, None)
-    if not conf:
-        _LOGGER.error(
-            "SOMFY CUL configuration is missing. Please add a somfy_cul section to your configuration.yaml"
+    trace = None
+    if trace_size := conf.get(CONF_TRACE_SIZE, DEFAULT_TRACE_SIZE):
+        trace = FrameTrace(trace_size)
+        for cul in pool:
+            cul.trace = trace
+
+    hass.data[DOMAIN] = {
+        DATA_SOMFY_CUL: pool,
+        DATA_STATE_STORE: store,
+        DATA_POSITION_PUBLISHER: publisher,
+        DATA_REMOTES: remotes,
+        DATA_METRICS: metrics,
+        DATA_TRACE: trace,
+    }
+
+    async def _async_close(*_) -> None:
+        await _async_close_hub(pool, store)
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_close)
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_FINAL_WRITE, store.async_flush)
+
+    if metrics is not None:
+        hass.async_create_task(
+            async_load_platform(hass, Platform.SENSOR, DOMAIN, {}, config)
         )
-        return False
 
-    cul_path = conf[CONF_CUL_PATH]
-    baud_rate = int(conf.get(CONF_BAUD_RATE, 38400))
-    cul = None
+    if trace is not None:
 
-    # Create API instance
-    try:
-        cul = Cul(cul_path, baud_rate)
-    except ValueError as e:
-        _LOGGER.error("Could not connect to CUL")
+        @callback
+        def _dump_trace(call: ServiceCall) -> ServiceResponse:
+            """Return the frame trace."""
+            return {"now": hass.loop.time(), "frames": dump_trace(hass)}
 
-    # Validate the API connection (and authentication)
-    # version = cul.get_cul_version()
-    # if not isinstance(version, str) or len(version) < 1:
-    #     _LOGGER.error("Could not read CUL version")
-    #     return False
+        hass.services.async_register(
+            DOMAIN,
+            SERVICE_DUMP_TRACE,
+            _dump_trace,
+            supports_response=SupportsResponse.ONLY,
+        )
 
-    # _LOGGER.info("CUL version %s", version)
+    @callback
+    def _dump_diagnostics(call: ServiceCall) -> ServiceResponse:
+        """Return the diagnostics, also without a config entry."""
+        return dump_diagnostics(hass)
 
-    # Store an API object for your platforms to access
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_DUMP_DIAGNOSTICS,
+        _dump_diagnostics,
+        supports_response=SupportsResponse.ONLY,
+    )
 
-    hass.data[DOMAIN] = {DATA_SOMFY_CUL: cul}
+    @callback
+    def _async_frame_received(frame: SomfyFrame) -> None:
+        """Update the covers of a remote and publish the frame as event."""
+        covers = remotes.get(frame.address, ())
+        for cover in covers:
+            cover.async_handle_remote_frame(frame)
+        hass.bus.async_fire(
+            EVENT_REMOTE_COMMAND,
+            {
+                "address": frame.address,
+                "command": f"{frame.command:X}0",
+                "rolling_code": frame.rolling_code,
+                "enc_key": frame.enc_key,
+                "entity_id": [cover.entity_id for cover in covers],
+            },
+        )
+
+    for cul in pool:
+        cul.async_add_listener(_async_frame_received)
+        # Open the serial transports in the background, not blocking startup
+        hass.async_create_background_task(
+            cul.async_connect(), f"{DOMAIN} connect {cul.name}"
+        )
+
+
+async def _async_close_hub(pool: CulPool, store: SomfyStateStore) -> None:
+    """Close the CUL devices and write pending changes of the state file."""
+    for cul in pool:
+        await cul.async_close()
+    await store.async_flush()
 
-    return True
+
+def dump_trace(hass: HomeAssistant) -> list[dict] | None:
+    """Return the frames in the trace, received ones with the covers they update."""
+    somfy_cul_data = hass.data.get(DOMAIN, {})
+    if (trace := somfy_cul_data.get(DATA_TRACE)) is None:
+        return None
+    remotes = somfy_cul_data.get(DATA_REMOTES, {})
+    return trace.as_list(
+        {
+            address: [cover.entity_id for cover in covers]
+            for address, covers in remotes.items()
+        }
+    )
 
 
-async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Unload a config entry."""
-    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+def dump_diagnostics(hass: HomeAssistant) -> dict[str, Any]:
+    """Return the state of the CUL devices, the runtime metrics and the frame trace."""
+    somfy_cul_data = hass.data.get(DOMAIN, {})
+    pool = somfy_cul_data.get(DATA_SOMFY_CUL)
+    store = somfy_cul_data.get(DATA_STATE_STORE)
+    metrics = somfy_cul_data.get(DATA_METRICS)
+
+    diagnostics: dict[str, Any] = {
+        "culs": {},
+        "state_file": store.path if store is not None else None,
+        "metrics": metrics.as_dict() if metrics is not None else None,
+        "trace": dump_trace(hass),
+    }
+    now = hass.loop.time()
+    for cul in pool or ():
+        diagnostics["culs"][cul.name] = {
+            "connected": cul.connected,
+            "queue_depth": cul.queue_depth,
+            "last_wait_time": cul.last_wait_time,
+            "mean_wait_time": cul.mean_wait_time,
+            "last_tx_latency": cul.last_tx_latency,
+            "tx_latency": {
+                priority.name.lower(): latency
+                for priority, latency in zip(Priority, cul.tx_latencies, strict=True)
+            },
+            "airtime": cul.governor.as_dict(now),
+        }
+    return diagnostics
@@ -0,0 +1,129 @@
+"""Encoding and decoding of Somfy RTS frames in the culfw `Ys` format.
+
+A Somfy command is a hex string of the following form: KKC0RRRRSSSSSS.
+
+KK - Encryption key: First byte always 'A', second byte varies
+C - Command (1 = My, 2 = Up, 4 = Down, 8 = Prog)
+0 - Checksum
+RRRR - Rolling code
+SSSSSS - Address (= remote channel)
+
+This module has no Home Assistant dependencies.
+"""
+
+_HEX = b"0123456789ABCDEF"
+
+# XOR of both nibbles of every byte value. The checksum is the XOR of all
+# nibbles of the ASCII frame, with the checksum itself set to '0'.
+_NIBBLE_XOR = bytes((b ^ b >> 4) & 0xF for b in range(256))
+
+# Two hex digits of every byte value, and the checksum of these digits
+_BYTE_HEX = [b"%02X" % b for b in range(256)]
+_BYTE_CHECKSUM = bytes(_NIBBLE_XOR[h[0]] ^ _NIBBLE_XOR[h[1]] for h in _BYTE_HEX)
+
+
+class SomfyFrame:
+    """A decoded Somfy RTS frame."""
+
+    __slots__ = ("address", "command", "enc_key", "rolling_code")
+
+    def __init__(self, enc_key, command, rolling_code, address) -> None:
+        """Initialize the frame."""
+        self.enc_key = enc_key
+        self.command = command
+        self.rolling_code = rolling_code
+        self.address = address
+
+    def __repr__(self) -> str:
+        """Return the frame for debug logs."""
+        return (
+            f"SomfyFrame(address={self.address}, command={self.command:X}, "
+            f"rolling_code={self.rolling_code}, enc_key={self.enc_key:02X})"
+        )
+
+
+class FrameEncoder:
+    """Encode frames of one address into a preallocated buffer.
+
+    The address part of the frame and its checksum are computed once.
+    """
+
+    __slots__ = ("_base_checksum", "_buffer")
+
+    def __init__(self, address: str) -> None:
+        """Initialize the encoder for `address`."""
+        address_bytes = address.encode()
+        self._buffer = bytearray(b"YsA0000000" + address_bytes + b"\n")
+        checksum = _NIBBLE_XOR[ord("A")] ^ _NIBBLE_XOR[ord("0")]
+        for char in address_bytes:
+            checksum ^= _NIBBLE_XOR[char]
+        self._base_checksum = checksum
+
+    def encode(self, enc_key: int, command: int, rolling_code: int) -> bytes:
+        """Return the `Ys` line sending `command` (a nibble, e.g. 0x2 for Up)."""
+        buf = self._buffer
+        key = _HEX[enc_key & 0xF]
+        cmd = _HEX[command & 0xF]
+        high = rolling_code >> 8 & 0xFF
+        low = rolling_code & 0xFF
+        checksum = (
+            self._base_checksum
+            ^ _NIBBLE_XOR[key]
+            ^ _NIBBLE_XOR[cmd]
+            ^ _BYTE_CHECKSUM[high]
+            ^ _BYTE_CHECKSUM[low]
+        )
+        buf[3] = key
+        buf[4] = cmd
+        buf[5] = _HEX[checksum]
+        buf[6:8] = _BYTE_HEX[high]
+        buf[8:10] = _BYTE_HEX[low]
+        return bytes(buf)
+
+    def encode_batch(
+        self, enc_key: int, command: int, rolling_code: int, count: int
+    ) -> list[bytes]:
+        """Return the next `count` frames, each with the next key and rolling code.
+
+        The run is built in one buffer from copies of the frame, only the key,
+        checksum and rolling code of each copy are filled in.
+        """
+        template = bytearray(self._buffer)
+        cmd = _HEX[command & 0xF]
+        template[4] = cmd
+        size = len(template)
+        run = template * count
+        checksum = self._base_checksum ^ _NIBBLE_XOR[cmd]
+        offset = 0
+        for i in range(count):
+            key = _HEX[(enc_key + i) & 0xF]
+            code = (rolling_code + i) & 0xFFFF
+            high = code >> 8
+            low = code & 0xFF
+            run[offset + 3] = key
+            run[offset + 5] = _HEX[
+                checksum ^ _NIBBLE_XOR[key] ^ _BYTE_CHECKSUM[high] ^ _BYTE_CHECKSUM[low]
+            ]
+            run[offset + 6 : offset + 10] = _BYTE_HEX[high] + _BYTE_HEX[low]
+            offset += size
+        return bytes(run).splitlines(keepends=True)
+
+
+def decode_frame(line: str, received=True) -> SomfyFrame | None:
+    """Decode a culfw reception line `YsKKCXRRRRAAAAAA[SS]`.
+
+    culfw reports the address bytes of `received` frames in reverse order,
+    they are returned in the order used for sending.
+    """
+    if not line.startswith("Ys") or len(line) < 16:
+        return None
+    try:
+        data = bytes.fromhex(line[2:16])
+    except ValueError:
+        return None
+    return SomfyFrame(
+        data[0],
+        data[1] >> 4,
+        data[2] << 8 | data[3],
+        (data[6:3:-1] if received else data[4:7]).hex().upper(),
+    )
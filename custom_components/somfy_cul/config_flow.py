@@ -0,0 +1,94 @@
+"""Config flow for the Somfy CUL integration."""
+
+from __future__ import annotations
+
+import logging
+import os
+import socket
+from typing import Any
+
+import serial
+import voluptuous as vol
+
+from homeassistant.config_entries import ConfigFlow, ConfigFlowResult
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import CONF_BAUD_RATE, CONF_CUL_PATH, DOMAIN
+from .cul import CONNECT_TIMEOUT, parse_tcp_url
+
+_LOGGER = logging.getLogger(__name__)
+
+STEP_USER_DATA_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_CUL_PATH, default="/dev/ttyAMA0"): str,
+        vol.Required(CONF_BAUD_RATE, default=38400): vol.Coerce(int),
+    }
+)
+
+
+class CannotConnect(HomeAssistantError):
+    """Error to indicate the CUL device cannot be opened."""
+
+
+def _open_serial_port(path: str, baud_rate: int) -> None:
+    """Open and close the serial port, raises CannotConnect on failure."""
+    try:
+        address = parse_tcp_url(path)
+    except ValueError as e:
+        raise CannotConnect(str(e)) from e
+    if address is not None:
+        try:
+            socket.create_connection(address, timeout=CONNECT_TIMEOUT).close()
+        except OSError as e:
+            raise CannotConnect(f"Failed to connect to {path}: {e}") from e
+        return
+
+    if not os.path.exists(path):  # noqa: PTH110
+        raise CannotConnect(f"Device {path} does not exist")
+    if not os.access(path, os.R_OK | os.W_OK):
+        raise CannotConnect(
+            f"Device {path} exists but does not have read/write permissions"
+        )
+    try:
+        with serial.Serial(path, baud_rate, timeout=1):
+            pass
+    except serial.SerialException as e:
+        raise CannotConnect(f"Failed to open {path}: {e}") from e
+
+
+async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
+    """Validate the user input allows us to connect.
+
+    Data has the keys from STEP_USER_DATA_SCHEMA with values provided by the user.
+    """
+    await hass.async_add_executor_job(
+        _open_serial_port, data[CONF_CUL_PATH], data[CONF_BAUD_RATE]
+    )
+    return {"title": f"CUL {data[CONF_CUL_PATH]}"}
+
+
+class SomfyCulConfigFlow(ConfigFlow, domain=DOMAIN):
+    """Handle a config flow for Somfy CUL."""
+
+    VERSION = 1
+
+    async def async_step_user(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Handle the initial step."""
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            await self.async_set_unique_id(user_input[CONF_CUL_PATH])
+            self._abort_if_unique_id_configured()
+            try:
+                info = await validate_input(self.hass, user_input)
+            except CannotConnect as e:
+                _LOGGER.warning("Cannot use CUL device: %s", e)
+                errors["base"] = "cannot_connect"
+            else:
+                return self.async_create_entry(title=info["title"], data=user_input)
+
+        return self.async_show_form(
+            step_id="user", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
+        )
@@ -4,16 +4,40 @@ from __future__ import annotations
 
 from typing import Final
 
+import voluptuous as vol
+
 DOMAIN = "somfy_cul"
 
 # Config flow
 CONF_CUL_PATH: Final = "cul_path"  # /dev/ttyAMA0
 CONF_BAUD_RATE: Final = "baud_rate"  # 38400
+CONF_STATE_FORMAT: Final = "state_format"  # yaml | json
+CONF_POSITION_UPDATE_INTERVAL: Final = "position_update_interval"  # seconds
+CONF_METRICS: Final = "metrics"  # false
+CONF_TRACE_SIZE: Final = "trace_size"  # frames
+CONF_DEVICES: Final = "devices"  # further CUL devices
+CONF_DUTY_CYCLE: Final = "duty_cycle"  # percent
+CONF_REPETITIONS: Final = "repetitions"  # by frame class
+
+DEFAULT_CUL = "default"
 
 CONF_NAME: Final = "name"
 CONF_TYPE: Final = "shutter"
 CONF_ADDRESS: Final = "address"
 CONF_REVERSED: Final = "reversed"
+CONF_ROLLING_CODE_BLOCK: Final = "rolling_code_block"
+CONF_START_DELAY: Final = "start_delay"
+CONF_STOP_DELAY: Final = "stop_delay"
+CONF_UP_PROFILE: Final = "up_profile"
+CONF_DOWN_PROFILE: Final = "down_profile"
+CONF_REMOTES: Final = "remotes"
+CONF_CUL: Final = "cul"
+CONF_ROUND_ROBIN: Final = "round_robin"
+CONF_COALESCE_WINDOW: Final = "coalesce_window"
+CONF_MEMBERS: Final = "members"
+CONF_COVERS: Final = "covers"
+CONF_MY_POSITION: Final = "my_position"
+CONF_MY_TOLERANCE: Final = "my_tolerance"
 
 ATTR_ENC_KEY: Final = "enc_key"
 ATTR_ROLLING_CODE: Final = "rolling_code"
@@ -21,7 +45,36 @@ ATTR_UP_TIME: Final = "up_time"
 ATTR_DOWN_TIME: Final = "down_time"
 ATTR_CURRENT_POS: Final = "current_pos"
 
+# Number of rolling codes reserved with a single write of the state file.
+# Somfy receivers accept codes up to about 100 ahead of the last one seen.
+DEFAULT_ROLLING_CODE_BLOCK = 16
+MAX_ROLLING_CODE_BLOCK = 64
+
+# Seconds a set_cover_position call waits for further calls, only the last
+# target of a burst is sent
+DEFAULT_COALESCE_WINDOW = 0.25
+
+# Positions this close to the favorite (MY) position of a cover are reached
+# with a single MY frame, the motor stops there by itself
+DEFAULT_MY_TOLERANCE = 5
+
+# Repetitions of each frame class of the CUL (FRAME_MOVE, FRAME_STOP and
+# FRAME_PROG in cul.py), culfw accepts up to 255
+REPETITIONS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(frame_class): vol.All(vol.Coerce(int), vol.Range(min=0, max=255))
+        for frame_class in ("move", "stop", "prog")
+    }
+)
+
 DATA_SOMFY_CUL = "somfy_cul_data"
+DATA_STATE_STORE = "somfy_cul_state_store"
+DATA_POSITION_PUBLISHER = "somfy_cul_position_publisher"
+DATA_REMOTES = "somfy_cul_remotes"
+DATA_METRICS = "somfy_cul_metrics"
+DATA_TRACE = "somfy_cul_trace"
+
+STATE_FILE = "somfy_cover_state"
 
 MANUFACTURER = "Somfy"
 
@@ -30,3 +83,25 @@ SERVICE_OPEN = "open_cover"
 SERVICE_CLOSE = "close_cover"
 SERVICE_STOP = "stop_cover"
 SERVICE_RELOAD = "reload_state"
+SERVICE_DUMP_TRACE = "dump_trace"
+SERVICE_DUMP_DIAGNOSTICS = "dump_diagnostics"
+
+EVENT_REMOTE_COMMAND = "somfy_cul_remote_command"
+
+
+class Command(vol.Enum):
+    """Available SOMFY commands."""
+
+    MY: Final = "10"
+    STOP: Final = "10"
+    OPEN: Final = "20"
+    MY_UP: Final = "30"
+    CLOSE: Final = "40"
+    MY_DOWN: Final = "50"
+    UP_DOWN: Final = "60"
+    MY_UP_DOWN: Final = "70"
+    PROG: Final = "80"
+    WIND_SUN: Final = "90"
+    WIND_ONLY: Final = "A0"
+
+    POS: Final = "POS"  # custom
@@ -1,15 +1,12 @@
 """Cover Platform for the Somfy MyLink component."""
 
 import asyncio
+from contextlib import contextmanager
+from functools import partial
 import logging
-import os
-from threading import Timer
-import time
-from typing import Any, Final
+from typing import Any
 
-import aiofiles
 import voluptuous as vol
-import yaml
 
 from homeassistant.components.cover import (
     ATTR_POSITION,
@@ -19,13 +16,15 @@ from homeassistant.components.cover import (
     CoverEntityFeature,
     CoverState,
 )
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers import config_validation as cv
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import PlatformNotReady
+from homeassistant.helpers import config_validation as cv, entity_platform
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
 
+from .codec import FrameEncoder, SomfyFrame
 from .const import (
     ATTR_CURRENT_POS,
     ATTR_DOWN_TIME,
@@ -33,45 +32,62 @@ from .const import (
     ATTR_ROLLING_CODE,
     ATTR_UP_TIME,
     CONF_ADDRESS,
+    CONF_COALESCE_WINDOW,
+    CONF_COVERS,
+    CONF_CUL,
+    CONF_DOWN_PROFILE,
+    CONF_MEMBERS,
+    CONF_MY_POSITION,
+    CONF_MY_TOLERANCE,
     CONF_NAME,
+    CONF_REMOTES,
+    CONF_REPETITIONS,
     CONF_REVERSED,
+    CONF_ROLLING_CODE_BLOCK,
+    CONF_ROUND_ROBIN,
+    CONF_START_DELAY,
+    CONF_STOP_DELAY,
     CONF_TYPE,
+    CONF_UP_PROFILE,
+    DATA_POSITION_PUBLISHER,
+    DATA_REMOTES,
     DATA_SOMFY_CUL,
+    DATA_STATE_STORE,
+    DEFAULT_COALESCE_WINDOW,
+    DEFAULT_MY_TOLERANCE,
+    DEFAULT_ROLLING_CODE_BLOCK,
     DOMAIN,
     MANUFACTURER,
+    MAX_ROLLING_CODE_BLOCK,
+    REPETITIONS_SCHEMA,
     SERVICE_CLOSE,
     SERVICE_OPEN,
     SERVICE_PROG,
     SERVICE_RELOAD,
     SERVICE_STOP,
+    Command,
 )
-from .cul import Cul
-
-
-class Command(vol.Enum):
-    """Available SOMFY commands."""
-
-    MY: Final = "10"
-    STOP: Final = "10"
-    OPEN: Final = "20"
-    MY_UP: Final = "30"
-    CLOSE: Final = "40"
-    MY_DOWN: Final = "50"
-    UP_DOWN: Final = "60"
-    MY_UP_DOWN: Final = "70"
-    PROG: Final = "80"
-    WIND_SUN: Final = "90"
-    WIND_ONLY: Final = "A0"
-
-    POS: Final = "POS"  # custom
-
-
-CONFIG_FILE = "somfy_cover_state.yaml"
+from .cul import FRAME_MOVE, FRAME_PROG, FRAME_STOP, Priority
+from .position import PositionModel, PositionPublisher
+from .router import CulRoute
+from .store import SomfyStateStore
 
 _LOGGER = logging.getLogger(__name__)
-_STATE_FILE_LOCK = asyncio.Lock()
 
-PLATFORM_SCHEMA = COVER_PLATFORM_SCHEMA.extend(
+# Commands of remotes that change the tracked state of a cover
+REMOTE_COMMANDS = {
+    0x1: Command.STOP,
+    0x2: Command.OPEN,
+    0x4: Command.CLOSE,
+}
+
+TRAVEL_PROFILE_SCHEMA = vol.All(
+    cv.ensure_list,
+    [vol.ExactSequence([vol.Coerce(float), vol.Coerce(float)])],
+    [vol.ExactSequence([vol.Range(min=0, max=100), vol.Range(min=0, max=100)])],
+)
+
+COVER_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_NAME): cv.string,
         vol.Required(CONF_ADDRESS): cv.string,
@@ -79,22 +95,80 @@ PLATFORM_SCHEMA = COVER_PLATFORM_SCHEMA.extend(
         vol.Optional(CONF_REVERSED, default=False): int,
         vol.Optional(ATTR_UP_TIME): vol.Coerce(int),
         vol.Optional(ATTR_DOWN_TIME): vol.Coerce(int),
+        vol.Optional(
+            CONF_ROLLING_CODE_BLOCK, default=DEFAULT_ROLLING_CODE_BLOCK
+        ): vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_ROLLING_CODE_BLOCK)),
+        vol.Optional(CONF_START_DELAY, default=0): vol.Coerce(float),
+        vol.Optional(CONF_STOP_DELAY, default=0): vol.Coerce(float),
+        vol.Optional(CONF_UP_PROFILE): TRAVEL_PROFILE_SCHEMA,
+        vol.Optional(CONF_DOWN_PROFILE): TRAVEL_PROFILE_SCHEMA,
+        vol.Optional(CONF_REMOTES, default=[]): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(CONF_CUL): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(CONF_ROUND_ROBIN, default=False): cv.boolean,
+        vol.Optional(CONF_MEMBERS): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(CONF_REPETITIONS, default={}): REPETITIONS_SCHEMA,
+        vol.Optional(CONF_COALESCE_WINDOW, default=DEFAULT_COALESCE_WINDOW): vol.All(
+            vol.Coerce(float), vol.Range(min=0)
+        ),
+        vol.Optional(CONF_MY_POSITION): vol.All(
+            vol.Coerce(int), vol.Range(min=0, max=100)
+        ),
+        vol.Optional(CONF_MY_TOLERANCE, default=DEFAULT_MY_TOLERANCE): vol.All(
+            vol.Coerce(int), vol.Range(min=0, max=100)
+        ),
     }
 )
 
+# A platform entry is either a single cover or a list of `covers`
+PLATFORM_SCHEMA = vol.Any(
+    COVER_PLATFORM_SCHEMA.extend(COVER_SCHEMA.schema),
+    COVER_PLATFORM_SCHEMA.extend(
+        {vol.Required(CONF_COVERS): vol.All(cv.ensure_list, [COVER_SCHEMA])}
+    ),
+)
 
-def setup_platform(
+
+async def async_setup_platform(
     hass: HomeAssistant,
     config: ConfigType,
-    add_entities: AddEntitiesCallback,
+    async_add_entities: AddEntitiesCallback,
     discovery_info: DiscoveryInfoType | None = None,
 ) -> None:
     """Discover and configure Somfy covers."""
-    somfy_cul_data = hass.data.get(DOMAIN, {})
-    somfy_cul = somfy_cul_data[DATA_SOMFY_CUL] or None
-
-    if not somfy_cul:
-        _LOGGER.warning("SOMFY CUL device is not available")
+    if (somfy_cul_data := hass.data.get(DOMAIN)) is None:
+        # The config entry with the CUL devices is not set up yet
+        raise PlatformNotReady("SOMFY CUL is not set up")
+    pool = somfy_cul_data[DATA_SOMFY_CUL]
+    store = somfy_cul_data[DATA_STATE_STORE]
+    publisher = somfy_cul_data[DATA_POSITION_PUBLISHER]
+
+    # All covers of the entry are created in one pass and added at once
+    covers = [
+        cover
+        for cover_config in config.get(CONF_COVERS) or [config]
+        if (cover := _create_cover(hass, cover_config, pool, store, publisher))
+    ]
+
+    platform = entity_platform.async_get_current_platform()
+    for service, method in (
+        (SERVICE_PROG, "async_prog_cover"),
+        (SERVICE_OPEN, "async_open_cover"),
+        (SERVICE_CLOSE, "async_close_cover"),
+        (SERVICE_STOP, "async_stop_cover"),
+        (SERVICE_RELOAD, "async_reload_state"),
+    ):
+        platform.async_register_entity_service(service, {}, method)
+
+    async_add_entities(covers)
+
+
+def _create_cover(hass, config, pool, store, publisher):
+    """Create the cover of `config`, returns None if its config is invalid."""
+    try:
+        route = pool.route(config.get(CONF_CUL), config.get(CONF_ROUND_ROBIN, False))
+    except ValueError as e:
+        _LOGGER.error("Cannot add Somfy Cover %s: %s", config.get(CONF_NAME), e)
+        return None
 
     cover_config = {
         "name": config.get(CONF_NAME),
@@ -103,17 +177,33 @@ def setup_platform(
         "up_time": config.get(ATTR_UP_TIME),
         "down_time": config.get(ATTR_DOWN_TIME),
         "reverse": config.get(CONF_REVERSED, False),
+        "rolling_code_block": config.get(
+            CONF_ROLLING_CODE_BLOCK, DEFAULT_ROLLING_CODE_BLOCK
+        ),
+        "start_delay": config.get(CONF_START_DELAY, 0),
+        "stop_delay": config.get(CONF_STOP_DELAY, 0),
+        "up_profile": config.get(CONF_UP_PROFILE),
+        "down_profile": config.get(CONF_DOWN_PROFILE),
+        "remotes": config.get(CONF_REMOTES, []),
+        "coalesce_window": config.get(CONF_COALESCE_WINDOW, DEFAULT_COALESCE_WINDOW),
+        "repetitions": config.get(CONF_REPETITIONS, {}),
+        "my_position": config.get(CONF_MY_POSITION),
+        "my_tolerance": config.get(CONF_MY_TOLERANCE, DEFAULT_MY_TOLERANCE),
     }
 
-    cover = SomfyCulShade(hass, somfy_cul, **cover_config)
+    if members := config.get(CONF_MEMBERS):
+        cover = SomfyCulGroup(
+            hass, route, store, publisher, members=members, **cover_config
+        )
+    else:
+        cover = SomfyCulShade(hass, route, store, publisher, **cover_config)
 
     _LOGGER.debug(
         "Adding Somfy Cover: %s with address %s",
         cover_config["name"],
         cover_config["address"],
     )
-
-    add_entities([cover])
+    return cover
 
 
 class SomfyCulShade(RestoreEntity, CoverEntity):
@@ -125,10 +215,45 @@ class SomfyCulShade(RestoreEntity, CoverEntity):
     _attr_name = None
     _attr_unique_id = None
 
-    _enc_key: int = 1
-    _rolling_code: int = 0
-    _up_time = None
-    _down_time = None
+    # Covers are created in large numbers, keep the state of each one compact
+    __slots__ = (
+        "_address",
+        "_coalesce_window",
+        "_command_seq",
+        "_down_time",
+        "_drv_timer",
+        "_enc_key",
+        "_encoder",
+        "_expected_position_error",
+        "_hass",
+        "_model",
+        "_move_seq",
+        "_my_move",
+        "_my_position",
+        "_my_tolerance",
+        "_pending_frames",
+        "_pending_target",
+        "_plan_seq",
+        "_publish_pending",
+        "_publisher",
+        "_remotes",
+        "_repetitions",
+        "_reserve_task",
+        "_reverse",
+        "_rolling_code",
+        "_rolling_code_block",
+        "_rolling_code_persisted",
+        "_rolling_code_reserved",
+        "_save_pending",
+        "_somfy_cul",
+        "_start_delay",
+        "_stop_deadline",
+        "_stop_delay",
+        "_stop_timer",
+        "_store",
+        "_transaction_depth",
+        "_up_time",
+    )
 
     @property
     def supported_features(self) -> CoverEntityFeature:
@@ -150,30 +275,94 @@ class SomfyCulShade(RestoreEntity, CoverEntity):
 
         return supported_features
 
+    @property
+    def current_cover_position(self) -> int | None:
+        """Return the current position, computed from the model while moving."""
+        if self._model is not None and self._model.moving:
+            return round(self._model.position(self.hass.loop.time()))
+        return self._attr_current_cover_position
+
     def __init__(
         self,
         hass: HomeAssistant,
-        somfy_cul: Cul,
+        somfy_cul: CulRoute,
+        store: SomfyStateStore,
+        publisher: PositionPublisher,
         address: str,
         up_time: int | None = None,
         down_time: int | None = None,
         name="SomfyCover",
         reverse=False,
         device_class=CoverDeviceClass.SHADE,
+        rolling_code_block=DEFAULT_ROLLING_CODE_BLOCK,
+        start_delay=0.0,
+        stop_delay=0.0,
+        up_profile=None,
+        down_profile=None,
+        remotes=(),
+        coalesce_window=DEFAULT_COALESCE_WINDOW,
+        repetitions=None,
+        my_position=None,
+        my_tolerance=DEFAULT_MY_TOLERANCE,
     ) -> None:
         """Initialize the cover."""
         self._hass = hass
         self._somfy_cul = somfy_cul
+        self._store = store
+        self._publisher = publisher
 
         self._attr_name = name
         self._address = address
+        self._encoder = FrameEncoder(address)
         self._reverse = reverse
         self._up_time = up_time
         self._down_time = down_time
+        self._enc_key = 1
+        self._rolling_code = 0
+        self._rolling_code_block = rolling_code_block
+        # End of the block of reserved codes, and the end known to be on disk
+        self._rolling_code_reserved = self._rolling_code
+        self._rolling_code_persisted = self._rolling_code
+        self._reserve_task = None
+        # Frames queued at the CUL, each will take a rolling code when it is sent
+        self._pending_frames = 0
+        # Time from a frame on air until the motor starts/stops moving
+        self._start_delay = start_delay
+        self._stop_delay = stop_delay
+        # Addresses of the physical remotes paired with this cover
+        self._remotes = [address.upper(), *(remote.upper() for remote in remotes)]
+        # Bursts of set_cover_position within the window only send the last target
+        self._coalesce_window = coalesce_window
+        # Repetitions of frame classes overriding those of the CUL
+        self._repetitions = repetitions or {}
+        # Favorite position programmed into the motor, reached with a MY frame
+        self._my_position = my_position
+        self._my_tolerance = my_tolerance
+        # The cover moves to its favorite position, where the motor stops
+        self._my_move = False
+        self._pending_target = None
+        # Incremented by every command, a command waiting for airtime or for
+        # the coalescing window is dropped when a newer one supersedes it
+        self._command_seq = 0
+        # Sequence numbers of the commands that last changed the motion and
+        # that last planned the end of the move
+        self._move_seq = 0
+        self._plan_seq = 0
+        # State changes within a command are published and saved once
+        self._transaction_depth = 0
+        self._publish_pending = False
+        self._save_pending = False
+
+        self._model = None
+        if up_time or down_time:
+            self._model = PositionModel(
+                up_time or down_time, down_time or up_time, up_profile, down_profile
+            )
 
         self._drv_timer = None
         self._stop_timer = None
-        self._cmd_time = 0
+        self._stop_deadline = None
+        self._expected_position_error = 0.0
 
         self._attr_unique_id = address
         self._attr_device_class = device_class
@@ -184,6 +373,7 @@ class SomfyCulShade(RestoreEntity, CoverEntity):
         self._attr_extra_state_attributes = {
             "enc_key": self._enc_key,
             "rolling_code": self._rolling_code,
+            "expected_position_error": self._expected_position_error,
         }
 
         self._attr_device_info = DeviceInfo(
@@ -195,17 +385,17 @@ class SomfyCulShade(RestoreEntity, CoverEntity):
     async def async_close_cover(self, **kwargs: Any) -> None:
         """Close the cover."""
         cmd = Command.CLOSE if not self._reverse else Command.OPEN
-        self.send_command(cmd)
+        await self.async_send_command(cmd)
 
     async def async_open_cover(self, **kwargs: Any) -> None:
         """Open the cover."""
         cmd = Command.CLOSE if self._reverse else Command.OPEN
-        self.send_command(cmd)
+        await self.async_send_command(cmd)
 
     async def async_stop_cover(self, **kwargs: Any) -> None:
         """Stop the cover."""
         cmd = Command.STOP
-        self.send_command(cmd)
+        await self.async_send_command(cmd)
 
     async def async_set_cover_position(self, **kwargs):
         """Move the cover to a specific position."""
@@ -214,34 +404,258 @@ class SomfyCulShade(RestoreEntity, CoverEntity):
             return
 
         cmd = Command.POS
-        self.send_command(cmd, int(position))
+        if self._coalesce_window <= 0:
+            await self.async_send_command(cmd, int(position))
+            return
 
-    def send_command(self, cmd: Command, target_pos=None):
-        """Send a command to the CUL."""
+        # The first call of a burst waits for the others, which only update
+        # the target it sends
+        waiting = self._pending_target is not None
+        self._pending_target = (int(position), self._command_seq)
+        if waiting:
+            return
         try:
-            cmd, time_to_stop = self._update_state(cmd, target_pos)
-            self._somfy_cul.send_command(self._command_string(cmd))
-            if time_to_stop is not None:
-                self._stop_timer = Timer(time_to_stop, self._send_stop_command)
-                self._stop_timer.start()
+            await asyncio.sleep(self._coalesce_window)
         finally:
-            self._increase_rolling_code()
-            self._async_save_state()
+            (target_pos, seq), self._pending_target = self._pending_target, None
+        if seq != self._command_seq:
+            _LOGGER.debug("Position %s of %s superseded", target_pos, self.entity_id)
+            return
+        await self.async_send_command(cmd, target_pos)
 
-    def _send_stop_command(self):
+    async def async_send_command(self, cmd: Command, target_pos=None):
+        """Send a command to the CUL."""
+        self._command_seq += 1
+        seq = self._command_seq
+        if (
+            cmd == Command.POS
+            and self._model is not None
+            and self._model.moving
+            and self.current_cover_position == target_pos
+        ):
+            # Stop where the cover is now
+            cmd = Command.STOP
+        # A target near the favorite position needs no stop frame
+        my_move = cmd == Command.POS and self._is_my_target(target_pos)
+        if not my_move and self._continue_move(cmd, target_pos):
+            return
+
+        # The airtime planned for a former move is free now
+        self._somfy_cul.scheduler.release(self.entity_id)
+        if cmd != Command.STOP:
+            # A new move may start on another device, its stop frame follows it
+            self._somfy_cul.select()
+        if cmd == Command.POS and not my_move:
+            await self._async_wait_for_start_slot(target_pos)
+            if seq != self._command_seq:
+                _LOGGER.debug("Move of %s superseded", self.entity_id)
+                return
+
+        # Where the cover stays if its frame is never sent
+        resting = self.current_cover_position, self._attr_is_closed
+        # The state is published and saved once the frame is sent
+        with self._transaction():
+            if my_move:
+                if not self._start_my_move(self.hass.loop.time()):
+                    return
+                # MY shares its code with STOP, but starts a move here
+                cmd, time_to_stop = Command.MY, None
+                priority, frame_class = Priority.NORMAL, FRAME_MOVE
+            else:
+                cmd, time_to_stop = self._update_state(cmd, target_pos)
+                if cmd is None:
+                    return
+                priority = Priority.STOP if cmd == Command.STOP else Priority.NORMAL
+                frame_class = None
+            self._move_seq = self._plan_seq = seq
+            on_air = await self._async_send_frame(
+                cmd, priority, frame_class=frame_class
+            )
+            if self._move_seq != seq:
+                # A newer command changed the motion while the frame was
+                # queued, it may have replaced this frame
+                if (
+                    on_air is None
+                    and cmd != Command.STOP
+                    and self._model is not None
+                    and not self._model.moving
+                    and resting[0] is not None
+                ):
+                    # A stop frame was dropped with this start frame, the
+                    # motor never moved
+                    self._end_move(resting[0])
+                    self._attr_is_closed = resting[1]
+                    self._async_save_state()
+                return
+            if on_air is None:
+                if self._model is not None and self._model.moving:
+                    # The motor never got the command and stays where it was
+                    self._reset_timer()
+                    self._end_move(round(self._model.stop(self._model.start_time)))
+                    self._async_save_state()
+                return
+            if self._model is not None and self._model.moving:
+                # The motor starts moving when the frame is on air, not when queued
+                self._model.retime(on_air + self._start_delay)
+            if time_to_stop is not None and self._plan_seq == seq:
+                # The motor stops `stop_delay` after the STOP frame is on air, and the
+                # frame needs the measured TX latency to get there
+                self._stop_deadline = (
+                    self._model.start_time + time_to_stop - self._stop_delay
+                )
+                self._stop_timer = self.hass.loop.call_at(
+                    self._stop_deadline - self._somfy_cul.tx_latency,
+                    self._send_stop_command,
+                )
+
+    def _continue_move(self, cmd: Command, target_pos=None) -> bool:
+        """Retarget the move in progress if it already goes towards the target.
+
+        The motor does not change its motion for an OPEN while opening or a
+        position ahead in the direction of travel, so no frame is sent, only
+        the stop frame and the end of the move are planned again. Returns
+        False if a frame must be sent, always during a move to the favorite
+        position.
+        """
+        model = self._model
+        if model is None or not model.moving or cmd == Command.STOP:
+            return False
+        if self._my_move:
+            # The motor stops at the favorite position whatever the target
+            return False
+        if self._stop_timer is None and self._stop_deadline is not None:
+            # The stop frame of a positioning move is on its way already
+            return False
+
+        now = self.hass.loop.time()
+        current = model.position(now)
+        if cmd == Command.POS:
+            target = target_pos
+        else:
+            target = 100 if cmd == Command.OPEN else 0
+        if (target > current) != (model.direction > 0) or round(current) == target:
+            return False
+
+        _LOGGER.debug("%s already moving towards %s", self.entity_id, target)
+        self._plan_seq = self._command_seq
+        remaining = model.travel_time(current, target)
+        self._reset_timer()
+        self._somfy_cul.scheduler.release(self.entity_id)
+        if cmd == Command.POS:
+            self._drv_timer = self.hass.loop.call_at(
+                now + remaining, self._write_state_pos, target
+            )
+            self._stop_deadline = now + remaining - self._stop_delay
+            self._stop_timer = self.hass.loop.call_at(
+                self._stop_deadline - self._somfy_cul.tx_latency,
+                self._send_stop_command,
+            )
+        else:
+            self._drv_timer = self.hass.loop.call_at(
+                now + remaining + 1,
+                self._write_state_open
+                if cmd == Command.OPEN
+                else self._write_state_closed,
+            )
+        return True
+
+    async def _async_send_frame(
+        self,
+        cmd: Command,
+        priority=Priority.NORMAL,
+        deadline=None,
+        frame_class=None,
+        plan_seq=None,
+    ):
+        """Send a frame of `cmd`, returns the time it went on air or None.
+
+        The frame is built when the CUL writes it, so its rolling code is only
+        consumed if it is actually sent. `frame_class` overrides the class
+        derived from `cmd`. A frame ending the move planned by the command
+        `plan_seq` is dropped if a newer command replaced that plan while
+        the rolling codes were reserved.
+        """
+        if frame_class is None:
+            if cmd == Command.STOP:
+                frame_class = FRAME_STOP
+            elif cmd == Command.PROG:
+                frame_class = FRAME_PROG
+            else:
+                frame_class = FRAME_MOVE
+        self._pending_frames += 1
         try:
-            self._somfy_cul.send_command(self._command_string(Command.STOP))
+            if not await self._async_reserve_rolling_codes():
+                _LOGGER.error(
+                    "Not sending %s to %s, its rolling code could not be saved",
+                    cmd,
+                    self.entity_id,
+                )
+                return None
+            if plan_seq is not None and plan_seq != self._plan_seq:
+                _LOGGER.debug("Stop of %s superseded", self.entity_id)
+                return None
+            return await self._somfy_cul.async_send_command(
+                partial(self._command_string, cmd),
+                priority,
+                deadline,
+                self.entity_id,
+                self._increase_rolling_code,
+                frame_class,
+                self._repetitions.get(frame_class),
+            )
         finally:
-            self._increase_rolling_code()
-            self._async_save_state()
+            self._pending_frames -= 1
+
+    async def _async_wait_for_start_slot(self, target_pos):
+        """Delay a positioning move until its start and stop frames have free airtime.
+
+        Also records the position error expected from a stop frame that cannot
+        be sent in time.
+        """
+        cmd, time_to_stop = self._calculate_position_command(target_pos)
+        if time_to_stop is None:
+            return
+
+        travel_time = self._up_time if cmd == Command.OPEN else self._down_time
+        now = self.hass.loop.time()
+        airtime_of = self._somfy_cul.airtime_of
+        plan = self._somfy_cul.scheduler.plan(
+            self.entity_id,
+            now,
+            time_to_stop,
+            travel_time,
+            airtime_of(FRAME_MOVE, self._repetitions.get(FRAME_MOVE)),
+            airtime_of(FRAME_STOP, self._repetitions.get(FRAME_STOP)),
+        )
+        self._expected_position_error = round(plan.expected_error, 1)
+        if plan.start_at > now:
+            _LOGGER.debug(
+                "Delaying start of %s by %.3f s", self.entity_id, plan.start_at - now
+            )
+            await asyncio.sleep(plan.start_at - now)
+
+    @callback
+    def _send_stop_command(self):
+        """Timer function called when a positioning move must be stopped."""
+        self._stop_timer = None
+        self.hass.async_create_task(self._async_send_stop_command())
+
+    async def _async_send_stop_command(self):
+        deadline = self._stop_deadline
+        with self._transaction():
+            on_air = await self._async_send_frame(
+                Command.STOP, Priority.STOP, deadline, plan_seq=self._plan_seq
+            )
+        if (
+            on_air is not None
+            and deadline is not None
+            and (metrics := self._somfy_cul.metrics) is not None
+        ):
+            metrics.stop_lateness.observe(on_air - deadline)
 
     async def async_prog_cover(self):
         """Handle the async_prog_cover service."""
-        try:
-            self._somfy_cul.send_command(self._command_string(Command.PROG))
-        finally:
-            self._increase_rolling_code()
-            self._async_save_state()
+        await self._async_send_frame(Command.PROG)
 
     async def async_added_to_hass(self) -> None:
         """Complete the initialization."""
@@ -255,83 +669,92 @@ class SomfyCulShade(RestoreEntity, CoverEntity):
         ):
             self._attr_is_closed = last_state.state == CoverState.CLOSED
 
-        if not await self._load_state_from_yaml():
-            await self._save_state_to_yaml()  # save initial state
+        with self._transaction():
+            if not self._load_state():
+                self._save_state()  # save initial state
 
-        self.platform.async_register_entity_service(
-            SERVICE_PROG, {}, "async_prog_cover"
-        )
-        self.platform.async_register_entity_service(
-            SERVICE_OPEN, {}, "async_open_cover"
-        )
-        self.platform.async_register_entity_service(
-            SERVICE_CLOSE, {}, "async_close_cover"
-        )
-        self.platform.async_register_entity_service(
-            SERVICE_STOP, {}, "async_stop_cover"
-        )
-        self.platform.async_register_entity_service(
-            SERVICE_RELOAD, {}, "async_reload_state"
-        )
+        remotes = self.hass.data[DOMAIN][DATA_REMOTES]
+        for remote in self._remotes:
+            remotes.setdefault(remote, []).append(self)
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop the timers of a move and routing remote frames to this cover."""
+        # Commands still waiting to be sent are dropped
+        self._command_seq += 1
+        self._reset_timer()
+        self._publisher.async_remove(self)
+        # The hub may have been unloaded before its covers
+        remotes = self.hass.data.get(DOMAIN, {}).get(DATA_REMOTES, {})
+        for remote in self._remotes:
+            if self in (covers := remotes.get(remote, ())):
+                covers.remove(self)
+
+    @callback
+    def async_handle_remote_frame(self, frame: SomfyFrame) -> None:
+        """Track a frame sent by a remote paired with this cover."""
+        if frame.address == self._remotes[0]:
+            # Another controller sends with our address, keep the rolling code ahead
+            if (frame.rolling_code - self._rolling_code) % 0x10000 < 0x8000:
+                self._rolling_code = (frame.rolling_code + 1) % 0x10000
+
+        if (cmd := REMOTE_COMMANDS.get(frame.command)) is not None:
+            self.async_handle_remote_command(cmd, self.hass.loop.time(), frame.address)
+
+    @callback
+    def async_handle_remote_command(self, cmd: Command, on_air, address) -> None:
+        """Track a command that went on air at `on_air` from the remote `address`."""
+        moving = self._attr_is_opening or self._attr_is_closing
+        my_move = cmd == Command.STOP and not moving
+        if my_move and not self._can_move_to_my_position():
+            # MY on a resting cover moves to an unknown favorite position
+            return
+
+        _LOGGER.debug("Remote %s sent %s to %s", address, cmd, self.entity_id)
+        # The remote overrides commands still waiting to be sent
+        self._command_seq += 1
+        self._move_seq = self._plan_seq = self._command_seq
+        self._somfy_cul.scheduler.release(self.entity_id)
+        with self._transaction():
+            if my_move:
+                self._start_my_move(on_air)
+            else:
+                self._update_state(cmd, on_air=on_air)
+            if self._model is not None and self._model.moving:
+                self._model.retime(on_air + self._start_delay)
 
     async def async_reload_state(self, **kwargs: Any) -> None:
-        """Reload the state from the YAML file."""
-        await self._load_state_from_yaml()
-
-    async def _save_state_to_yaml(self):
-        """Save the current state to the file using self.entity_id as the key."""
-        async with _STATE_FILE_LOCK:
-            state_data = await self._read_state_yaml()
-
-            # Update state for the current address
-            state_data[self.entity_id] = self._get_state()
-
-            # Save updated state back to the file
-            state_file_path = self._get_state_file_path()
-            async with aiofiles.open(
-                state_file_path, mode="w", encoding="utf-8"
-            ) as file:
-                await file.write(yaml.safe_dump(state_data, default_flow_style=False))
-
-    async def _load_state_from_yaml(self):
-        """Load the state for self.entity_id from the file, if it exists."""
-        state_data = await self._read_state_yaml()
-
-        # Load state for the current address if it exists
-        if self.entity_id in state_data:
-            self._set_state(state_data[self.entity_id])
-        else:
-            return False
+        """Reload the state from the state file.
 
-        return True
+        The file is only parsed again if it was modified since it was last
+        read or written, so calling this for many entities is cheap.
+        """
+        await self._store.async_reload()
+        self._load_state()
 
-    async def _read_state_yaml(self):
-        """Load the state from the file, if it exists."""
-        state_file_path = self._get_state_file_path()
-        state_data = {}
-        if os.path.exists(state_file_path):  # noqa: PTH110
-            try:
-                async with aiofiles.open(state_file_path, encoding="utf-8") as file:
-                    try:
-                        content = await file.read()
-                        state_data = yaml.safe_load(content) or {}
-                    except yaml.YAMLError as e:
-                        _LOGGER.error("Error reading YAML file: %s", e)
-            except FileNotFoundError:
-                _LOGGER.debug(
-                    "State YAML file not existing: %s. Creating a new one",
-                    state_file_path,
-                )
-        return state_data
+    def _save_state(self):
+        """Hand the current state to the store, which writes it to the file."""
+        self._store.async_set(self.entity_id, self._get_state())
+
+    def _load_state(self):
+        """Load the state for self.entity_id from the store, if it exists."""
+        state = self._store.get(self.entity_id, self._address)
+        if state is None:
+            return False
 
-    def _get_state_file_path(self):
-        """Get the full path to the state file."""
-        return self._hass.config.path(CONFIG_FILE)
+        self._set_state(state)
+        return True
 
     def _get_state(self):
+        """Return the state to persist.
+
+        The rolling code stored is the reserved high-water mark, together with
+        the encryption key that belongs to it, so a restart resumes there.
+        """
+        reserved = (self._rolling_code_reserved - self._rolling_code) % 0x10000
         return {
-            ATTR_ENC_KEY: self._enc_key,
-            ATTR_ROLLING_CODE: self._rolling_code,
+            CONF_ADDRESS: self._address,
+            ATTR_ENC_KEY: (self._enc_key + reserved) % 0x10,
+            ATTR_ROLLING_CODE: self._rolling_code_reserved,
             ATTR_CURRENT_POS: self._attr_current_cover_position,
         }
 
@@ -339,25 +762,105 @@ class SomfyCulShade(RestoreEntity, CoverEntity):
         """Set the object's state from a dictionary."""
         self._enc_key = state.get(ATTR_ENC_KEY, self._enc_key)
         self._rolling_code = state.get(ATTR_ROLLING_CODE, self._rolling_code)
+        self._rolling_code_reserved = self._rolling_code
+        self._rolling_code_persisted = self._rolling_code
         self._attr_current_cover_position = state.get(
             ATTR_CURRENT_POS, self._attr_current_cover_position
         )
-        self._attr_extra_state_attributes = {
-            "enc_key": self._enc_key,
-            "rolling_code": self._rolling_code,
-        }
-        self.schedule_update_ha_state(force_refresh=True)
+        self._async_write_state()
+
+    @contextmanager
+    def _transaction(self):
+        """Collect the state changes of a command, published and saved at the end.
+
+        Transactions may nest and overlap, the state is committed when the
+        last one ends.
+        """
+        self._transaction_depth += 1
+        try:
+            yield
+        finally:
+            self._transaction_depth -= 1
+            if not self._transaction_depth:
+                self._async_commit_state()
 
     def _async_save_state(self):
-        self._attr_extra_state_attributes = {
-            "enc_key": self._enc_key,
-            "rolling_code": self._rolling_code,
-        }
-        self.schedule_update_ha_state()
-        self.hass.loop.call_soon_threadsafe(self._async_save_state_task)
+        """Publish and persist the state, at the end of the current transaction."""
+        self._save_pending = True
+        self._async_write_state()
+
+    def _async_write_state(self):
+        """Publish the state, at the end of the current transaction."""
+        self._publish_pending = True
+        if not self._transaction_depth:
+            self._async_commit_state()
+
+    def _async_commit_state(self):
+        """Write the state to Home Assistant and the store, if it changed."""
+        if self._publish_pending:
+            self._publish_pending = False
+            self._attr_extra_state_attributes = {
+                "enc_key": self._enc_key,
+                "rolling_code": self._rolling_code,
+                "expected_position_error": self._expected_position_error,
+            }
+            self.async_write_ha_state()
+        if self._save_pending:
+            self._save_pending = False
+            self._save_state()
+
+    async def _async_reserve_rolling_codes(self) -> bool:
+        """Make sure the rolling code of the next frame is reserved on disk.
+
+        Only the upper end of a block of codes is written, and it is on disk
+        before the first code of the block is sent. After a crash the cover
+        resumes at the end of the block, which skips at most
+        `rolling_code_block` codes and stays within the acceptance window of
+        the receiver. Once half of a block is used, the next one is written
+        in the background, so frames rarely wait for the file.
+
+        Frames still queued at the CUL count as using a code each. Frames
+        needing a new block wait for the same write. Returns False if the
+        state file could not be written, the frame must not be sent then.
+        """
+        while True:
+            pending = self._pending_frames
+            left = (self._rolling_code_persisted - self._rolling_code) % 0x10000
+            if pending <= left < self._rolling_code_block + pending:
+                if left - pending < self._rolling_code_block // 2:
+                    self._async_reserve_block()
+                return True
+            if not await asyncio.shield(self._async_reserve_block()):
+                return False
+
+    def _async_reserve_block(self) -> asyncio.Task:
+        """Reserve the next block of rolling codes, returns the task writing it."""
+        if self._reserve_task is not None:
+            return self._reserve_task
+        reserved = (
+            self._rolling_code + self._pending_frames - 1 + self._rolling_code_block
+        ) % 0x10000
+        self._rolling_code_reserved = reserved
+        _LOGGER.debug(
+            "Reserving rolling codes up to %d for device %s", reserved, self._address
+        )
+        self._save_state()
+        self._reserve_task = self.hass.async_create_task(
+            self._async_write_reservation(reserved)
+        )
+        return self._reserve_task
 
-    def _async_save_state_task(self):
-        self.hass.async_create_task(self._save_state_to_yaml())
+    async def _async_write_reservation(self, reserved) -> bool:
+        """Write the state file, the codes up to `reserved` may be sent then."""
+        try:
+            if not await self._store.async_flush():
+                return False
+            if self._rolling_code_reserved == reserved:
+                # Unless the state was reloaded meanwhile
+                self._rolling_code_persisted = reserved
+            return True
+        finally:
+            self._reserve_task = None
 
     def _increase_rolling_code(self):
         """Increment rolling_code, roll over when crossing the 16 bit boundary.
@@ -377,11 +880,20 @@ class SomfyCulShade(RestoreEntity, CoverEntity):
         )
 
     def _reset_timer(self):
-        """Reset timer functions."""
+        """Reset timer functions, including a pending stop of a positioning move."""
         if self._drv_timer is not None:
             _LOGGER.debug("Resetting timer")
             self._drv_timer.cancel()
             self._drv_timer = None
+        self._cancel_stop_timer()
+        self._stop_deadline = None
+
+    def _cancel_stop_timer(self):
+        """Cancel the stop frame scheduled for a positioning move."""
+        if self._stop_timer is not None:
+            _LOGGER.debug("Cancelling pending stop command")
+            self._stop_timer.cancel()
+            self._stop_timer = None
 
     def _write_state(self, cmd: Command, position=None):
         if cmd == Command.OPEN:
@@ -396,58 +908,104 @@ class SomfyCulShade(RestoreEntity, CoverEntity):
     def _write_state_pos(self, position):
         """Timer function called when shutter has been set to position."""
         _LOGGER.debug("Write state position for device: %s", self._attr_name)
-        self._attr_is_opening = False
-        self._attr_is_closing = False
+        self._end_move(position)
         self._attr_is_closed = position >= 99
-        self._attr_current_cover_position = position
         self._async_save_state()
 
     def _write_state_open(self):
         """Timer function called when shutter has been opened."""
         _LOGGER.debug("Write state open for device: %s", self._attr_name)
-        self._attr_is_opening = False
-        self._attr_is_closing = False
+        self._end_move(100)
         self._attr_is_closed = False
-        self._attr_current_cover_position = 100
         self._async_save_state()
 
     def _write_state_closed(self):
         """Timer function called when shutter has been closed."""
         _LOGGER.debug("Write state closed for device: %s", self._attr_name)
-        self._attr_is_opening = False
-        self._attr_is_closing = False
+        self._end_move(0)
         self._attr_is_closed = True
-        self._attr_current_cover_position = 0
         self._async_save_state()
 
     def _write_state_stopped(self, position=0):
         """Timer function called when shutter has been closed."""
         _LOGGER.debug("Write state stopped for device: %s", self._attr_name)
+        self._end_move(position)
+        self._attr_is_closed = False
+        self._async_save_state()
+
+    def _start_move(self, direction, at):
+        """Start the position model and live publishing of a move."""
+        self._attr_is_opening = direction > 0
+        self._attr_is_closing = direction < 0
+        self._my_move = False
+        if self._model is not None:
+            current = self.current_cover_position
+            if current is None:
+                current = 0 if direction > 0 else 100
+            self._model.start(at, current, direction)
+            self._publisher.async_add(self)
+
+    def _end_move(self, position):
+        """End a move at `position`."""
         self._attr_is_opening = False
         self._attr_is_closing = False
-        self._attr_is_closed = False
+        self._my_move = False
         self._attr_current_cover_position = position
+        if self._model is not None:
+            self._model.set_position(position)
+        self._publisher.async_remove(self)
+
+    def _can_move_to_my_position(self) -> bool:
+        """Return True if a MY frame moves the cover to a known position."""
+        return (
+            self._my_position is not None
+            and self._model is not None
+            and not self._model.moving
+            and self._attr_current_cover_position is not None
+        )
+
+    def _is_my_target(self, target_position) -> bool:
+        """Return True if `target_position` is reached with a single MY frame."""
+        return (
+            self._can_move_to_my_position()
+            and target_position != self._attr_current_cover_position
+            and abs(target_position - self._my_position) <= self._my_tolerance
+        )
+
+    def _start_my_move(self, at) -> bool:
+        """Track the move of a resting cover to its favorite position from `at`.
+
+        The motor stops at the favorite position by itself, so only the end
+        of the move is planned. Returns False if the cover is already there.
+        """
+        current = self._attr_current_cover_position
+        if current == self._my_position:
+            _LOGGER.debug("Already at the favorite position")
+            return False
+
+        self._reset_timer()
+        self._start_move(1 if self._my_position > current else -1, at)
+        self._my_move = True
         self._async_save_state()
+        self._drv_timer = self.hass.loop.call_at(
+            at + self._model.travel_time(current, self._my_position),
+            self._write_state_pos,
+            self._my_position,
+        )
+        return True
 
     def _calculate_position_command(
         self, target_position: int | None = None
     ) -> tuple[Command, float]:
-        cur = self._attr_current_cover_position or 0
-        target = target_position or 100
-
-        if target > cur:
-            cmd = Command.OPEN
-            time_per_step = self._up_time / 100
-            time_to_stop = time_per_step * (target - cur)
-        elif target < cur:
-            cmd = Command.CLOSE
-            time_per_step = self._down_time / 100
-            time_to_stop = time_per_step * (cur - target)
-        else:
+        cur = self.current_cover_position or 0
+        target = 100 if target_position is None else target_position
+
+        if target == cur:
             _LOGGER.debug("Already at position")
             return None, None
 
-        return cmd, time_to_stop
+        cmd = Command.OPEN if target > cur else Command.CLOSE
+        return cmd, self._model.travel_time(cur, target)
 
     def _start_update_state_timer(
         self, cmd: Command, target_position=None
@@ -457,8 +1015,7 @@ class SomfyCulShade(RestoreEntity, CoverEntity):
         Returns the time after which the cover must be stoppped in case of a target position
         """
         _LOGGER.debug("Starting a timer for device: %s", self._attr_name)
-        self._reset_timer()
-        self._cmd_time = time.time()
+        now = self.hass.loop.time()
 
         # This is the time, after which the cover must be stoppped in case of a target position
         time_to_stop = None
@@ -469,34 +1026,32 @@ class SomfyCulShade(RestoreEntity, CoverEntity):
                 _LOGGER.error("Position cannot be set")
                 return None, None
 
-            self._drv_timer = Timer(
-                time_to_stop, self._write_state_pos, args=(target_position,)
+            self._reset_timer()
+            self._start_move(1 if cmd == Command.OPEN else -1, now)
+            self._async_save_state()
+
+            self._drv_timer = self.hass.loop.call_at(
+                now + time_to_stop, self._write_state_pos, target_position
             )
             _LOGGER.debug("POS timer with timeout: %s", time_to_stop)
 
-        elif cmd == Command.OPEN:
-            self._attr_is_opening = True
-            self._attr_is_closing = False
-            self._async_save_state()
+        elif cmd in (Command.OPEN, Command.CLOSE):
+            target = 100 if cmd == Command.OPEN else 0
+            timeout = self._up_time if cmd == Command.OPEN else self._down_time
+            if (cur := self.current_cover_position) is not None:
+                timeout = self._model.travel_time(cur, target) + 1
 
-            timeout = self._up_time
-            if self._attr_current_cover_position is not None:
-                cur = self._attr_current_cover_position / 100
-                timeout = timeout * (1 - cur) + 1
-            self._drv_timer = Timer(timeout, self._write_state_open)
-            _LOGGER.debug("OPEN timer with timeout: %s", timeout)
-
-        elif cmd == Command.CLOSE:
-            self._attr_is_opening = False
-            self._attr_is_closing = True
+            self._reset_timer()
+            self._start_move(1 if cmd == Command.OPEN else -1, now)
             self._async_save_state()
 
-            timeout = self._down_time
-            if self._attr_current_cover_position is not None:
-                cur = self._attr_current_cover_position / 100
-                timeout = timeout * (cur) + 1
-            self._drv_timer = Timer(timeout, self._write_state_closed)
-            _LOGGER.debug("CLOSE timer with timeout: %s", timeout)
+            self._drv_timer = self.hass.loop.call_at(
+                now + timeout,
+                self._write_state_open
+                if cmd == Command.OPEN
+                else self._write_state_closed,
+            )
+            _LOGGER.debug("%s timer with timeout: %s", cmd, timeout)
 
         else:
             _LOGGER.warning(
@@ -505,15 +1060,14 @@ class SomfyCulShade(RestoreEntity, CoverEntity):
             )
             return None, None
 
-        self._drv_timer.start()
-
         return cmd, time_to_stop
 
     def _update_state(
-        self, cmd: Command, target_position=None
+        self, cmd: Command, target_position=None, on_air=None
     ) -> tuple[Command, float]:
         """Calculate position, publish state and position.
 
+        `on_air` is the time the frame was received, for frames of remotes.
         Returns the time after which the cover must be stoppped in case of a target position
         """
         _LOGGER.debug("Updating state for command: %s", cmd)
@@ -536,79 +1090,84 @@ class SomfyCulShade(RestoreEntity, CoverEntity):
                 self._write_state(cmd)
 
         elif cmd == Command.STOP:
-            current_pos = (
-                50
-                if not self._attr_current_cover_position
-                else self._attr_current_cover_position
-            )
-            current_time = time.time()
-
-            if self._drv_timer is not None and (
-                self._attr_is_closing or self._attr_is_opening
-            ):
-                self._reset_timer()
-                if self._cmd_time > 0:
-                    ti = current_time - self._cmd_time
-                    dt = self._up_time if self._attr_is_opening else self._down_time
-                    current_pos += int(ti / dt * 100) * (
-                        1 if self._attr_is_opening else -1
-                    )
+            self._reset_timer()
+
+            if self._model is not None and self._model.moving:
+                # The motor stops once this STOP is on air plus its stop delay
+                if on_air is None:
+                    on_air = self.hass.loop.time() + self._somfy_cul.tx_latency
+                current_pos = self._model.stop(on_air + self._stop_delay)
+            else:
+                current_pos = self._attr_current_cover_position or 50
 
             # Make sure that pos is in range 0..100
-            current_pos = max(min(current_pos, 100), 0)
+            current_pos = max(min(round(current_pos), 100), 0)
 
             # publish stopped state and calculated position
             self._write_state_stopped(current_pos)
-            self._cmd_time = 0
 
         return cmd, time_to_stop
 
-    def _calculate_checksum(self, command_string: str):
-        """Calculate checksum for command string.
-
-        From https://pushstack.wordpress.com/somfy-rts-protocol/ :
-        The checksum is calculated by doing a XOR of all nibbles of the frame.
-        To generate a checksum for a frame set the 'cks' field to 0 before
-        calculating the checksum.
-        """
-        cmd = bytearray(command_string, "utf-8")
-        checksum = 0
-        for char in cmd:
-            checksum = checksum ^ char ^ (char >> 4)
-        checksum = checksum & 0xF
-        return f"{checksum:01X}"
-
     def _command_string(self, cmd: Command):
-        """Generate command string.
-
-        A Somfy command is a hex string of the following form: KKC0RRRRSSSSSS.
-
-        KK - Encryption key: First byte always 'A', second byte varies
-        C - Command (1 = My, 2 = Up, 4 = Down, 8 = Prog)
-        0 - Checksum (set to 0 for calculating checksum)
-        RRRR - Rolling code
-        SSSSSS - Address (= remote channel)
-        """
-        command_string = (
-            f"A{self._enc_key:01X}{cmd.value}{self._rolling_code:04X}{self._address}"
+        """Generate the `Ys` command string, see codec.py for the frame format."""
+        command_string = self._encoder.encode(
+            self._enc_key, int(cmd.value, 16) >> 4, self._rolling_code
         )
-
-        chksum = self._calculate_checksum(command_string)
-
-        command_string = command_string[:3] + chksum + command_string[4:]
         _LOGGER.debug(
             "Generated string %s from command %s for device %s",
             command_string,
-            cmd.value,
-            self.name,
+            cmd,
+            self._attr_name,
         )
-        _LOGGER.debug(
-            "ENC Key: %s, CMD: %s, CHKSUM: %s, Rolling Code: %s, Address: %s",
-            self._enc_key,
-            cmd.value,
-            chksum,
-            self._rolling_code,
-            self._address,
+        return command_string
+
+
+class SomfyCulGroup(SomfyCulShade):
+    """A virtual remote paired with several covers.
+
+    The group has its own address, rolling code and encryption key. Pair it
+    with each member by calling `prog_cover` on the group while the member is
+    in programming mode. A single frame of the group then moves all members,
+    and the state of every member is updated as for a frame of a remote.
+    """
+
+    __slots__ = ("_members",)
+
+    def __init__(self, *args, members=(), **kwargs) -> None:
+        """Initialize the group of the covers with the addresses `members`."""
+        super().__init__(*args, **kwargs)
+        self._members = [member.upper() for member in members]
+
+    def _member_covers(self):
+        """Return the member covers that are set up."""
+        remotes = self.hass.data.get(DOMAIN, {}).get(DATA_REMOTES, {})
+        return [
+            cover
+            for address in self._members
+            for cover in remotes.get(address, ())
+            if cover._remotes[0] == address
+        ]
+
+    async def _async_send_frame(
+        self,
+        cmd: Command,
+        priority=Priority.NORMAL,
+        deadline=None,
+        frame_class=None,
+        plan_seq=None,
+    ):
+        """Send a frame of `cmd` and update the members once it is on air."""
+        on_air = await super()._async_send_frame(
+            cmd, priority, deadline, frame_class, plan_seq
         )
-        command_string = "Ys" + command_string + "\n"
-        return command_string.encode()
+        if on_air is not None and cmd in REMOTE_COMMANDS.values():
+            for cover in self._member_covers():
+                cover.async_handle_remote_command(cmd, on_air, self._remotes[0])
+        return on_air
+
+    @callback
+    def async_handle_remote_command(self, cmd: Command, on_air, address) -> None:
+        """Track a received frame with the address of the group for all members."""
+        super().async_handle_remote_command(cmd, on_air, address)
+        for cover in self._member_covers():
+            cover.async_handle_remote_command(cmd, on_air, address)
@@ -1,73 +1,721 @@
 """Connect to CUL Device."""
 
+import asyncio
+from collections.abc import Callable
+import contextlib
+from enum import IntEnum
+from functools import partial
+import itertools
 import logging
-import os
-import sys
+import socket
+import time
+from urllib.parse import urlsplit
 
 import serial
+import serial_asyncio_fast
+
+from .codec import SomfyFrame, decode_frame
+from .governor import CULFW_REPETITIONS, AirtimeGovernor, frame_airtime
+from .metrics import Metrics
+from .scheduler import StopScheduler
+from .trace import (
+    OUTCOME_EXPIRED,
+    OUTCOME_FAILED,
+    OUTCOME_MERGED,
+    OUTCOME_RECEIVED,
+    OUTCOME_REPEATED,
+    OUTCOME_SENT,
+    RX,
+    TX,
+    FrameTrace,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+# Remotes send every frame several times, copies within this window are dropped
+RX_REPEAT_WINDOW = 1.0
+# Time to wait for the answer to a command like `V`
+RESPONSE_TIMEOUT = 2.0
+# Delay between attempts to reopen a lost device, doubled up to the maximum
+RECONNECT_MIN_DELAY = 1.0
+RECONNECT_MAX_DELAY = 60.0
+# Frames buffered while the device is not connected, further ones are dropped
+TX_BUFFER_SIZE = 64
+# Frames not sent within this time are dropped, a stale command must not fire
+COMMAND_EXPIRY = 30.0
+# Time to establish a network connection to a CUL, e.g. on a ser2net server
+CONNECT_TIMEOUT = 10.0
+# TCP keepalive: probe an idle connection after KEEPALIVE_IDLE seconds every
+# KEEPALIVE_INTERVAL seconds, it is lost after KEEPALIVE_COUNT failed probes
+KEEPALIVE_IDLE = 30
+KEEPALIVE_INTERVAL = 10
+KEEPALIVE_COUNT = 3
+# URL schemes of a raw TCP connection to the CUL, e.g. tcp://host:port
+TCP_SCHEMES = ("tcp", "socket")
+
+# Classes of frames with their own number of repetitions (culfw `Yr`). Stop
+# frames are sent with fewer repetitions, they must get through quickly and
+# the motor is close by its remote anyway; pairing needs more.
+FRAME_MOVE = "move"
+FRAME_STOP = "stop"
+FRAME_PROG = "prog"
+DEFAULT_REPETITIONS = {FRAME_MOVE: CULFW_REPETITIONS, FRAME_STOP: 3, FRAME_PROG: 12}
+
+
+class CulUnavailable(Exception):
+    """A frame cannot be written, the CUL device is not connected."""
+
+
+class Priority(IntEnum):
+    """Priority classes of the TX queue, lower values are sent first.
+
+    Within a class, frames are sent earliest deadline first.
+    """
+
+    STOP = 0
+    NORMAL = 1
+
+
+class TxRequest:
+    """A frame waiting in the TX queue.
+
+    `command_string` is the frame, or a function building it when it is
+    written. `on_sent` is called once the frame was written. Frames sent on
+    air have a `frame_class`, the number of `repetitions` and the `airtime`
+    that go with it, other commands have none of them.
+    """
+
+    __slots__ = (
+        "airtime",
+        "command_string",
+        "deferred",
+        "enqueued",
+        "expiry",
+        "failover",
+        "frame_class",
+        "future",
+        "on_sent",
+        "priority",
+        "repetitions",
+        "source",
+    )
+
+    def __init__(
+        self, command_string, priority, enqueued, future, source, on_sent
+    ) -> None:
+        """Initialize the request."""
+        self.command_string = command_string
+        self.priority = priority
+        self.enqueued = enqueued
+        self.future = future
+        self.source = source
+        self.on_sent = on_sent
+        self.expiry: asyncio.TimerHandle | None = None
+        self.deferred = False
+        self.failover = False
+        self.frame_class: str | None = None
+        self.repetitions: int | None = None
+        self.airtime = 0.0
+
+
+def parse_tcp_url(url) -> tuple[str, int] | None:
+    """Return host and port of a tcp:// or socket:// URL, None for device paths.
+
+    Raises ValueError for such a URL without host or port, and for the URLs
+    of other schemes, like rfc2217://, which the serial transport cannot
+    drive.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in TCP_SCHEMES:
+        if "://" in url:
+            raise ValueError(
+                f"{url} is not supported, use a device path or tcp://host:port"
+            )
+        return None
+    if not parts.hostname or parts.port is None:
+        raise ValueError(f"{url} needs a host and a port")
+    return parts.hostname, parts.port
+
+
+def _configure_socket(sock) -> None:
+    """Send frames without delay and detect a dead TCP connection."""
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    for option, value in (
+        ("TCP_KEEPIDLE", KEEPALIVE_IDLE),
+        ("TCP_KEEPINTVL", KEEPALIVE_INTERVAL),
+        ("TCP_KEEPCNT", KEEPALIVE_COUNT),
+    ):
+        # Not available on all platforms
+        if hasattr(socket, option):
+            sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
+
+
+def _transmits(command_string) -> bool:
+    """Return True if the command sends a frame, functions always build one."""
+    return callable(command_string) or command_string.startswith(b"Ys")
+
 
 class Cul:
-    """Helper class to encapsulate serial communication with CUL device."""
+    """Helper class to encapsulate serial communication with CUL device.
+
+    The device is a serial port, or a CUL on a ser2net server at a
+    tcp://host:port URL (socket:// works the same). It is driven by an
+    asyncio transport, so writes never block the event loop. All frames go
+    through a single prioritized TX queue that is drained by one writer
+    task, which writes a frame once the radio has sent the former one. The
+    `scheduler` plans positioning moves around the airtime of the frames
+    already planned on this device.
+
+    If the device is lost, a background task reopens it with exponential
+    backoff. Meanwhile up to TX_BUFFER_SIZE frames stay queued, each until
+    it expires.
 
-    def __init__(self, serial_port, baud_rate=115200, test=False) -> None:
-        """Create instance with a given serial port."""
+    A new frame of a sender replaces its frame still queued, so priorities
+    only reorder the frames of different senders. A stop frame for a start
+    frame still queued drops both.
 
-        self.exit_loop = False
-        self.serial = None
+    The `governor` keeps the frames within the duty cycle of the CUL. A frame
+    without enough credit waits in the queue.
 
-        if test:
-            self.serial = sys.stderr
-            self.test = True
-        else:
-            self.test = False
-            if not os.path.exists(serial_port):  # noqa: PTH110
-                raise ValueError(f"cannot find CUL device {serial_port}")
+    Frames are sent with the number of repetitions of their class in
+    `repetitions`, unless a frame asks for its own. The repetitions of the
+    device are only set (`Yr`) when they change from one frame to the next.
+
+    A reader task decodes Somfy frames received from remotes and passes them
+    to the listeners added with `async_add_listener`.
+
+    Runtime metrics are collected into `metrics`, and all frames sent and
+    received are recorded in `trace`, if set.
+    """
+
+    def __init__(
+        self, serial_port, baud_rate=115200, test=False, name=None, rx_history=None
+    ) -> None:
+        """Create instance with a given serial port.
+
+        The port is not opened here, call `async_connect` from the event loop.
+        Devices sharing `rx_history` pass on a frame received by several of
+        them once, and drop the frames sent by each other.
+        """
+
+        self.test = test
+        self.name = name or serial_port
+
+        self._serial_port = serial_port
+        self._baud_rate = baud_rate
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._connect_lock = asyncio.Lock()
+        self._connected_event = asyncio.Event()
+        self._reconnect_task: asyncio.Task | None = None
+        self._closing = False
+        self._read_task: asyncio.Task | None = None
+        self._response: asyncio.Future | None = None
+        self._listeners: list[Callable[[SomfyFrame], None]] = []
+        self._last_rx: dict[str, tuple[int, int, float]] = (
+            {} if rx_history is None else rx_history
+        )
+
+        self._tx_queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._tx_seq = itertools.count()
+        self._tx_task: asyncio.Task | None = None
+        self._buffered = 0
+        # Frames not yet taken for writing, by sender, to merge them
+        self._queued: dict[str, TxRequest] = {}
+        self._tx_wakeup = asyncio.Event()
+        # Loop time until which the radio sends the frames written so far
+        self._air_busy_until = 0.0
+        self.governor = AirtimeGovernor()
+        self.repetitions = dict(DEFAULT_REPETITIONS)
+        # Repetitions set at the device, unknown until set after opening it
+        self._repetitions: int | None = None
+        self.last_wait_time = 0.0
+        self.mean_wait_time = 0.0
+        self.last_tx_latency = 0.0
+        # Mean time from queueing a frame until it is on air, by priority class
+        self.tx_latencies = [0.0] * len(Priority)
+        self.scheduler = StopScheduler()
+        self.metrics: Metrics | None = None
+        self.trace: FrameTrace | None = None
+
+    @property
+    def connected(self) -> bool:
+        """Return True if the serial transport is open."""
+        return self.test or (self._writer is not None and not self._writer.is_closing())
+
+    async def async_connect(self) -> bool:
+        """Open the serial port, if not already open.
+
+        If it cannot be opened, it is retried in the background.
+        """
+        self._closing = False
+        if await self._async_open(logging.ERROR):
+            return True
+        self._start_reconnect()
+        return False
+
+    async def _async_open(self, log_level) -> bool:
+        """Open the serial port, logging a failure with `log_level`."""
+        if self.connected:
+            return True
+
+        async with self._connect_lock:
+            if self.connected:
+                return True
             try:
-                self.serial = serial.Serial(
-                    port=serial_port, baudrate=baud_rate, timeout=1
-                )
-            except serial.SerialException as e:
-                _LOGGER.error("Could not open CUL device: %s", e)
+                self._reader, self._writer = await self._async_open_connection()
+            except (serial.SerialException, OSError, ValueError) as e:
+                _LOGGER.log(log_level, "Could not open CUL device %s: %s", self.name, e)
+                self._reader = self._writer = None
+                return False
 
-    def get_cul_version(self):
-        """Get CUL version."""
-        self.serial.write("V\n")
-        self.serial.flush()
-        return self.serial.readline()
+            self._read_task = asyncio.get_running_loop().create_task(
+                self._async_read_loop(self._reader)
+            )
+            self._connected_event.set()
+
+        _LOGGER.debug("Opened CUL device %s", self._serial_port)
+        return True
+
+    async def _async_open_connection(
+        self,
+    ) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """Open the streams of the serial port or the network connection."""
+        if (address := parse_tcp_url(self._serial_port)) is not None:
+            async with asyncio.timeout(CONNECT_TIMEOUT):
+                reader, writer = await asyncio.open_connection(*address)
+            _configure_socket(writer.get_extra_info("socket"))
+            return reader, writer
+
+        # The port is opened in an executor thread
+        return await serial_asyncio_fast.open_serial_connection(
+            url=self._serial_port, baudrate=self._baud_rate
+        )
+
+    def _start_reconnect(self) -> None:
+        """Start reopening the serial port in the background, if not yet running."""
+        if self._closing or self.test:
+            return
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.get_running_loop().create_task(
+                self._async_reconnect_loop()
+            )
+
+    async def _async_reconnect_loop(self) -> None:
+        """Reopen the serial port with exponential backoff until it is open."""
+        delay = RECONNECT_MIN_DELAY
+        while not self.connected:
+            _LOGGER.debug("Reopening CUL device %s in %.0f s", self.name, delay)
+            await asyncio.sleep(delay)
+            if await self._async_open(logging.DEBUG):
+                _LOGGER.info("Reconnected to CUL device %s", self.name)
+                return
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
 
-    def send_command(self, command_string):
-        """Send command string to serial port with CUL device."""
+    def _connection_lost(self) -> None:
+        """Close the transport after an error and start reopening it."""
+        self._connected_event.clear()
+        if (
+            self._read_task is not None
+            and self._read_task is not asyncio.current_task()
+        ):
+            self._read_task.cancel()
+        self._read_task = None
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+        self._repetitions = None
+        self._start_reconnect()
+
+    def async_add_listener(
+        self, listener: Callable[[SomfyFrame], None]
+    ) -> Callable[[], None]:
+        """Call `listener` for every Somfy frame received, returns a remove function."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    async def _async_read_loop(self, reader: asyncio.StreamReader) -> None:
+        """Read lines from the CUL device until the connection is lost."""
+        while True:
+            try:
+                line = await reader.readline()
+            except (serial.SerialException, OSError) as e:
+                _LOGGER.error("Lost connection to CUL device %s: %s", self.name, e)
+                break
+            if not line:
+                _LOGGER.error("CUL device %s closed the connection", self._serial_port)
+                break
+            self._line_received(line.decode("utf-8", "replace").strip())
+
+        if self._reader is reader:
+            self._connection_lost()
+
+    def _line_received(self, line: str) -> None:
+        """Dispatch a line received from the CUL device."""
+        if (frame := decode_frame(line)) is None:
+            if line and self._response is not None and not self._response.done():
+                self._response.set_result(line)
+            return
+        if self.metrics is not None:
+            self.metrics.frames_received += 1
+
+        now = asyncio.get_running_loop().time()
+        last = self._last_rx.get(frame.address)
+        self._last_rx[frame.address] = (frame.rolling_code, frame.command, now)
+        if last is not None and last[:2] == (frame.rolling_code, frame.command):
+            if now - last[2] < RX_REPEAT_WINDOW:
+                if self.trace is not None:
+                    self.trace.record(now, RX, line, OUTCOME_REPEATED)
+                return
+        if self.trace is not None:
+            self.trace.record(now, RX, line, OUTCOME_RECEIVED)
+
+        _LOGGER.debug("Received %s", frame)
+        for listener in self._listeners:
+            listener(frame)
+
+    def _record_sent(self, command_string: bytes, sent) -> None:
+        """Record a frame sent until `sent` as received, so its echo is dropped.
+
+        Other devices sharing the history receive the frame, and would pass
+        it on as the press of a remote.
+        """
+        frame = decode_frame(command_string.decode(), received=False)
+        if frame is not None:
+            self._last_rx[frame.address] = (frame.rolling_code, frame.command, sent)
+
+    def airtime_of(self, frame_class, repetitions=None) -> float:
+        """Return the airtime of a frame of `frame_class`.
+
+        `repetitions` overrides the repetitions of the class.
+        """
+        if repetitions is None:
+            repetitions = self.repetitions[frame_class]
+        return frame_airtime(repetitions)
+
+    @property
+    def tx_latency(self) -> float:
+        """Return the latency of stop frames, the frames timed by it.
+
+        Frames of the other classes may wait in the queue or for airtime
+        credit, which stop frames skip.
+        """
+        return self.tx_latencies[Priority.STOP]
+
+    @property
+    def queue_depth(self) -> int:
+        """Return the number of frames waiting in the TX queue."""
+        return self._tx_queue.qsize()
+
+    async def async_close(self) -> None:
+        """Close the serial port and drop the queued frames."""
+        self._closing = True
+        for task in (self._reconnect_task, self._read_task, self._tx_task):
+            if task is not None:
+                task.cancel()
+        self._reconnect_task = self._read_task = self._tx_task = None
+        while not self._tx_queue.empty():
+            _, _, _, request = self._tx_queue.get_nowait()
+            if not request.future.done():
+                request.future.set_result(None)
+        self._connected_event.clear()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self._reader = None
+
+    async def async_get_cul_version(self):
+        """Get CUL version."""
         if self.test:
-            _LOGGER.info(command_string.decode())
-        elif self.serial:
+            return None
+        self._response = asyncio.get_running_loop().create_future()
+        try:
+            if not await self.async_send_command(b"V\n"):
+                return None
+            async with asyncio.timeout(RESPONSE_TIMEOUT):
+                return await self._response
+        except TimeoutError:
+            _LOGGER.error("CUL device did not answer to version request")
+            return None
+        finally:
+            self._response = None
+
+    async def async_send_command(
+        self,
+        command_string,
+        priority=Priority.NORMAL,
+        deadline=None,
+        source=None,
+        on_sent=None,
+        expires_in=COMMAND_EXPIRY,
+        frame_class=FRAME_MOVE,
+        repetitions=None,
+        failover=False,
+    ) -> float | None:
+        """Queue command string for the CUL device and wait until it is written.
+
+        Frames of a lower priority class are sent first, frames of the same
+        class by their `deadline` (loop time), which defaults to the time
+        they were queued. `source` names the sender in the frame trace.
+
+        `command_string` may be a function that builds the frame when it is
+        written, and `on_sent` is called once it was written. A frame not
+        written within `expires_in` seconds is dropped. A Somfy frame is
+        sent with `repetitions`, by default those of its `frame_class`.
+
+        Returns the loop time at which the frame reached the CUL and goes on
+        air, or None if it could not be sent: it expired, a newer frame of
+        its sender replaced it, it was a stop frame for a start frame that
+        was not sent, or the device was closed. With `failover`, a
+        frame the device is not connected for raises CulUnavailable instead
+        of waiting, so it can be sent with another device.
+        """
+        loop = asyncio.get_running_loop()
+        if failover and not self.connected:
+            raise CulUnavailable(f"CUL device {self.name} is not connected")
+        if not self.connected and self._buffered >= TX_BUFFER_SIZE:
+            _LOGGER.warning(
+                "CUL device %s is not available and its TX buffer is full, "
+                "dropping frame of %s",
+                self.name,
+                source,
+            )
+            return None
+        if self._tx_task is None or self._tx_task.done():
+            self._tx_task = loop.create_task(self._async_tx_loop())
+
+        now = loop.time()
+        request = TxRequest(
+            command_string, priority, now, loop.create_future(), source, on_sent
+        )
+        if _transmits(command_string):
+            if repetitions is None:
+                repetitions = self.repetitions[frame_class]
+            request.frame_class = frame_class
+            request.repetitions = repetitions
+            request.airtime = frame_airtime(repetitions)
+        request.failover = failover
+        request.expiry = loop.call_at(now + expires_in, self._expire, request)
+        self._buffered += 1
+        request.future.add_done_callback(partial(self._request_done, request))
+        if source is not None:
+            if (queued := self._queued.get(source)) is not None:
+                # Priorities only reorder the frames of different senders
+                self._merge(queued)
+                if (queued.frame_class, request.frame_class) == (
+                    FRAME_MOVE,
+                    FRAME_STOP,
+                ):
+                    # The motor never got the start frame, a stop frame alone
+                    # would move it to its favorite position (MY)
+                    self._merge(request)
+                    return await request.future
+            self._queued[source] = request
+        self._tx_queue.put_nowait(
+            (priority, deadline or now, next(self._tx_seq), request)
+        )
+        self._tx_wakeup.set()
+        return await request.future
+
+    def _request_done(self, request: TxRequest, future: asyncio.Future) -> None:
+        self._buffered -= 1
+        if self._queued.get(request.source) is request:
+            del self._queued[request.source]
+
+    def _merge(self, request: TxRequest) -> None:
+        """Drop a queued frame that a newer frame of its sender supersedes."""
+        _LOGGER.debug(
+            "Dropping queued frame of %s from CUL device %s", request.source, self.name
+        )
+        self.governor.merged += 1
+        request.expiry.cancel()
+        if self.trace is not None:
+            frame = request.command_string
+            self.trace.record(
+                asyncio.get_running_loop().time(),
+                TX,
+                frame if isinstance(frame, bytes) else None,
+                OUTCOME_MERGED,
+                request.source,
+            )
+        request.future.set_result(None)
+
+    def _expire(self, request: TxRequest) -> None:
+        """Drop a frame that was not written in time."""
+        if request.future.done():
+            return
+        _LOGGER.warning(
+            "Dropping frame of %s, CUL device %s did not send it in time",
+            request.source,
+            self.name,
+        )
+        if self.metrics is not None:
+            self.metrics.frames_expired += 1
+        if self.trace is not None:
+            frame = request.command_string
+            self.trace.record(
+                asyncio.get_running_loop().time(),
+                TX,
+                frame if isinstance(frame, bytes) else None,
+                OUTCOME_EXPIRED,
+                request.source,
+            )
+        request.future.set_result(None)
+
+    async def _async_tx_loop(self) -> None:
+        """Write queued frames to the CUL device, one at a time.
+
+        While the device is not connected, the frame at the head of the queue
+        waits for it, and is retried after a failed write, until it expires.
+        A frame that may fail over raises CulUnavailable instead.
+        A frame without enough airtime credit goes back into the queue, until
+        the credit suffices or a new frame arrives.
+
+        The next frame is only taken from the queue once the radio has sent the
+        former one. Frames wait here, not in the buffers of the serial port
+        and the CUL, so a stop frame still gets ahead of them.
+        """
+        loop = asyncio.get_running_loop()
+        governor = self.governor
+        while True:
+            if (busy := self._air_busy_until - loop.time()) > 0:
+                await asyncio.sleep(busy)
+            entry = await self._tx_queue.get()
+            request = entry[3]
+            if request.future.done():
+                # Expired or merged while buffered
+                continue
+            airtime = request.airtime
+            if airtime and (
+                delay := governor.delay(loop.time(), request.priority, airtime)
+            ):
+                if not request.deferred:
+                    request.deferred = True
+                    governor.deferred += 1
+                    _LOGGER.debug(
+                        "Deferring frame of %s by %.1f s, CUL device %s is short "
+                        "of airtime",
+                        request.source,
+                        delay,
+                        self.name,
+                    )
+                self._tx_queue.put_nowait(entry)
+                self._tx_wakeup.clear()
+                with contextlib.suppress(TimeoutError):
+                    async with asyncio.timeout(delay):
+                        await self._tx_wakeup.wait()
+                continue
+            if self._queued.get(request.source) is request:
+                # Being written, it cannot be merged anymore
+                del self._queued[request.source]
+            self.last_wait_time = loop.time() - request.enqueued
+            self.mean_wait_time += (self.last_wait_time - self.mean_wait_time) / 16
+            if (metrics := self.metrics) is not None:
+                metrics.tx_wait.observe(self.last_wait_time)
+
             try:
-                _LOGGER.debug("Writing command %s to CUL device.", command_string)
-                self.serial.write(command_string)
-                self.serial.flush()
-            except serial.SerialException as e:
-                _LOGGER.error(
-                    "Could not send command %s to CUL device: %s", command_string, e
+                command_string = await self._async_write_request(request)
+            except asyncio.CancelledError:
+                request.future.cancel()
+                raise
+            if command_string is None:
+                continue
+
+            # The frame is complete at the CUL once the UART has shifted it out,
+            # and goes on air once the radio has sent the frames before it
+            on_air = max(
+                loop.time() + len(command_string) * 10 / self._baud_rate,
+                self._air_busy_until,
+            )
+            self.last_tx_latency = on_air - request.enqueued
+            latencies = self.tx_latencies
+            priority = min(request.priority, len(latencies) - 1)
+            latencies[priority] += (self.last_tx_latency - latencies[priority]) / 16
+            if airtime:
+                governor.consume(loop.time(), airtime)
+                self._air_busy_until = on_air + airtime
+                self._record_sent(command_string, self._air_busy_until)
+            if metrics is not None:
+                metrics.frames_sent += 1
+            if self.trace is not None:
+                self.trace.record(
+                    loop.time(), TX, command_string, OUTCOME_SENT, request.source
                 )
-                return False
-        else:
+            request.expiry.cancel()
+            if request.on_sent is not None:
+                request.on_sent()
+            request.future.set_result(on_air)
+
+    async def _async_write_request(self, request: TxRequest) -> bytes | None:
+        """Write the frame of `request` once the device is connected.
+
+        Returns the frame written, or None if the request expired first.
+        """
+        loop = asyncio.get_running_loop()
+        while not request.future.done():
+            if not self.connected:
+                self._start_reconnect()
+                if request.failover:
+                    request.expiry.cancel()
+                    request.future.set_exception(
+                        CulUnavailable(f"CUL device {self.name} is not connected")
+                    )
+                    return None
+                waiter = loop.create_task(self._connected_event.wait())
+                try:
+                    await asyncio.wait(
+                        (waiter, request.future), return_when=asyncio.FIRST_COMPLETED
+                    )
+                finally:
+                    waiter.cancel()
+                continue
+
+            command_string = request.command_string
+            if callable(command_string):
+                try:
+                    command_string = command_string()
+                except Exception as e:  # noqa: BLE001
+                    request.expiry.cancel()
+                    request.future.set_exception(e)
+                    return None
+            data = command_string
+            repetitions = request.repetitions
+            if repetitions is not None and repetitions != self._repetitions:
+                # Set the repetitions together with the frame, in one write
+                data = b"Yr%d\n" % repetitions + command_string
+            if await self._async_write(data):
+                if repetitions is not None:
+                    self._repetitions = repetitions
+                return command_string
+            if self.metrics is not None:
+                self.metrics.frames_failed += 1
+            if self.trace is not None:
+                self.trace.record(
+                    loop.time(), TX, command_string, OUTCOME_FAILED, request.source
+                )
+        return None
+
+    async def _async_write(self, command_string) -> bool:
+        """Write command string to serial port with CUL device."""
+        if self.test:
+            _LOGGER.info(command_string.decode())
+            return True
+
+        metrics = self.metrics
+        try:
+            _LOGGER.debug("Writing command %s to CUL device.", command_string)
+            if metrics is not None:
+                start = time.perf_counter()
+            self._writer.write(command_string)
+            await self._writer.drain()
+            if metrics is not None:
+                metrics.serial_write.observe(time.perf_counter() - start)
+        except (serial.SerialException, OSError) as e:
             _LOGGER.error(
-                "Could not send command %s. SOMFY CUL is not available", command_string
+                "Could not send command %s to CUL device: %s", command_string, e
             )
+            self._connection_lost()
             return False
 
         return True
-
-    def listen(self, callback):
-        """Listen to messages from CUL."""
-        while not self.exit_loop:
-            # readline() blocks until message is available
-            try:
-                message = self.serial.readline().decode("utf-8")
-                if message:
-                    _LOGGER.debug("Received RF message: %s", message)
-                callback(message)
-            except Exception:  # noqa: BLE001
-                pass
@@ -0,0 +1,15 @@
+"""Diagnostics support for the Somfy CUL integration."""
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from . import dump_diagnostics
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return the state of the CUL device, the runtime metrics and the frame trace."""
+    return dump_diagnostics(hass)
@@ -0,0 +1,93 @@
+"""Airtime budget of a CUL device.
+
+culfw limits the transmissions of the CUL to a duty cycle of 1%, tracked as
+a credit of airtime that refills over time. Frames written while the credit
+is used up are dropped silently. The governor models this credit, so frames
+wait in the TX queue instead, and keeps a reserve for the stop frames of
+positioning moves.
+
+This module has no Home Assistant dependencies.
+"""
+
+from .scheduler import FRAME_AIRTIME
+
+# Repetitions of a frame culfw sends by default, FRAME_AIRTIME includes them
+CULFW_REPETITIONS = 6
+# Share of time the CUL may transmit, in percent
+DEFAULT_DUTY_CYCLE = 1.0
+# Window the duty cycle is averaged over, its airtime is the maximum credit
+DUTY_CYCLE_WINDOW = 3600.0
+# Credit that only frames of a higher priority may use, by priority class, in
+# frames. Stop frames may use all of it, normal frames leave a reserve for
+# the stops of their moves.
+RESERVED_FRAMES = (0, 10)
+
+
+def frame_airtime(repetitions=CULFW_REPETITIONS) -> float:
+    """Return the airtime of a frame sent with `repetitions`."""
+    return FRAME_AIRTIME * (1 + repetitions) / (1 + CULFW_REPETITIONS)
+
+
+class AirtimeGovernor:
+    """Credit of airtime of a CUL device, a token bucket.
+
+    The bucket holds the airtime of one `DUTY_CYCLE_WINDOW` and refills at
+    the duty cycle. A frame may be sent if the credit covers its airtime and
+    the reserve of its priority class.
+    """
+
+    __slots__ = (
+        "_credit",
+        "_updated",
+        "airtime",
+        "capacity",
+        "deferred",
+        "merged",
+        "rate",
+    )
+
+    def __init__(
+        self, duty_cycle=DEFAULT_DUTY_CYCLE, airtime=FRAME_AIRTIME, now=0.0
+    ) -> None:
+        """Initialize the governor with a full credit."""
+        self.rate = duty_cycle / 100
+        self.capacity = self.rate * DUTY_CYCLE_WINDOW
+        self.airtime = airtime
+        self._credit = self.capacity
+        self._updated = now
+        # Frames that had to wait for credit, and frames superseded meanwhile
+        self.deferred = 0
+        self.merged = 0
+
+    def credit(self, now) -> float:
+        """Return the credit in seconds of airtime at `now`."""
+        if now > self._updated:
+            self._credit = min(
+                self.capacity, self._credit + (now - self._updated) * self.rate
+            )
+            self._updated = now
+        return self._credit
+
+    def delay(self, now, priority, airtime=None) -> float:
+        """Return the time until a frame of `priority` may be sent, 0 if it may now.
+
+        `airtime` is the airtime of the frame, by default that of a frame
+        with the repetitions of culfw.
+        """
+        reserve = RESERVED_FRAMES[min(priority, len(RESERVED_FRAMES) - 1)]
+        missing = (airtime or self.airtime) + self.airtime * reserve
+        missing -= self.credit(now)
+        return missing / self.rate if missing > 0 else 0.0
+
+    def consume(self, now, airtime=None) -> None:
+        """Take the airtime of a frame sent at `now` from the credit."""
+        self._credit = self.credit(now) - (airtime or self.airtime)
+
+    def as_dict(self, now) -> dict:
+        """Return the state of the budget for diagnostics."""
+        return {
+            "credit": round(self.credit(now), 3),
+            "capacity": self.capacity,
+            "deferred": self.deferred,
+            "merged": self.merged,
+        }
@@ -0,0 +1,91 @@
+"""Runtime metrics of the CUL device, the state file and the covers.
+
+Metrics are only collected when enabled in the configuration. Instrumented
+code holds a `metrics` attribute that is None otherwise, so a disabled
+instrumentation point costs a single attribute test.
+
+This module has no Home Assistant dependencies.
+"""
+
+from bisect import bisect_left
+
+# Upper bounds of the buckets of timing histograms, in seconds. The first
+# bucket of the stop lateness holds stop frames on air early or in time.
+TIME_BUCKETS = (0.0, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0)
+# Upper bounds of the buckets of size histograms, in bytes
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+class Histogram:
+    """Counts of observed values in fixed buckets, with their sum and maximum."""
+
+    __slots__ = ("bounds", "count", "counts", "maximum", "total")
+
+    def __init__(self, bounds) -> None:
+        """Initialize the histogram with the upper bounds of its buckets."""
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = None
+
+    def observe(self, value) -> None:
+        """Add a value."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    @property
+    def mean(self) -> float | None:
+        """Return the mean of all values, None without values."""
+        return self.total / self.count if self.count else None
+
+    def as_dict(self) -> dict:
+        """Return the histogram for diagnostics and state attributes."""
+        buckets = {
+            f"le_{bound:g}": count for bound, count in zip(self.bounds, self.counts)
+        }
+        buckets["inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "mean": self.mean,
+            "max": self.maximum,
+            "buckets": buckets,
+        }
+
+
+class Metrics:
+    """Counters and histograms of one CUL device and its covers."""
+
+    def __init__(self) -> None:
+        """Initialize all metrics to zero."""
+        self.frames_sent = 0
+        self.frames_failed = 0
+        self.frames_expired = 0
+        self.frames_received = 0
+        # Time of writing a frame to the serial port until it is drained
+        self.serial_write = Histogram(TIME_BUCKETS)
+        # Time a frame waited in the TX queue
+        self.tx_wait = Histogram(TIME_BUCKETS)
+        # Time of writing the state file, and its size
+        self.save_duration = Histogram(TIME_BUCKETS)
+        self.save_bytes = Histogram(SIZE_BUCKETS)
+        # Time the stop frame of a positioning move went on air after it should
+        self.stop_lateness = Histogram(TIME_BUCKETS)
+
+    def as_dict(self) -> dict:
+        """Return all metrics for diagnostics."""
+        return {
+            "frames_sent": self.frames_sent,
+            "frames_failed": self.frames_failed,
+            "frames_expired": self.frames_expired,
+            "frames_received": self.frames_received,
+            "serial_write": self.serial_write.as_dict(),
+            "tx_wait": self.tx_wait.as_dict(),
+            "save_duration": self.save_duration.as_dict(),
+            "save_bytes": self.save_bytes.as_dict(),
+            "stop_lateness": self.stop_lateness.as_dict(),
+        }
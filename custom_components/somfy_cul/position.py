@@ -0,0 +1,146 @@
+"""Position model of Somfy covers, which report nothing back."""
+
+from bisect import bisect_right
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity import Entity
+
+
+class TravelProfile:
+    """Relation between travel time and position for one direction.
+
+    `points` are (time %, position %) pairs along a full move in this
+    direction, e.g. [(0, 0), (30, 10), (100, 100)] for a shutter that needs
+    the first 30% of its travel time to lift its slats. Without points the
+    profile is linear.
+    """
+
+    def __init__(self, travel_time, points=None) -> None:
+        """Initialize the profile of a move that takes `travel_time` seconds."""
+        points = sorted({(0.0, 0.0), (100.0, 100.0), *map(tuple, points or ())})
+        self.travel_time = travel_time
+        self._times = [t / 100 * travel_time for t, _ in points]
+        self._progress = [p / 100 for _, p in points]
+
+    def progress(self, elapsed) -> float:
+        """Return the fraction of the full move done after `elapsed` seconds."""
+        return self._interpolate(elapsed, self._times, self._progress)
+
+    def elapsed(self, progress) -> float:
+        """Return the time needed for `progress` of the full move."""
+        return self._interpolate(progress, self._progress, self._times)
+
+    @staticmethod
+    def _interpolate(x, xs, ys) -> float:
+        if x <= xs[0]:
+            return ys[0]
+        if x >= xs[-1]:
+            return ys[-1]
+        i = bisect_right(xs, x)
+        x0, x1, y0, y1 = xs[i - 1], xs[i], ys[i - 1], ys[i]
+        if x1 == x0:
+            return y1
+        return y0 + (y1 - y0) * (x - x0) / (x1 - x0)
+
+
+class PositionModel:
+    """Position of a cover computed on demand from the start of its move.
+
+    Positions are 0 (closed) to 100 (open). Opening follows the up profile
+    from 0 to 100, closing the down profile from 100 to 0.
+    """
+
+    def __init__(self, up_time, down_time, up_profile=None, down_profile=None) -> None:
+        """Initialize the model with travel times and optional profiles."""
+        self._up = TravelProfile(up_time, up_profile)
+        self._down = TravelProfile(down_time, down_profile)
+        self.start_time = 0.0
+        self._start_position = 0.0
+        self.direction = 0
+
+    @property
+    def moving(self) -> bool:
+        """Return True if the cover is moving."""
+        return self.direction != 0
+
+    def start(self, at, position, direction) -> None:
+        """Start a move from `position`, +1 opening, -1 closing."""
+        self.start_time = at
+        self._start_position = position
+        self.direction = direction
+
+    def retime(self, at) -> None:
+        """Correct the time the current move started."""
+        self.start_time = at
+
+    def set_position(self, position) -> None:
+        """Set the position of the resting cover."""
+        self._start_position = position
+        self.direction = 0
+
+    def position(self, at) -> float:
+        """Return the position at loop time `at`."""
+        if not self.direction:
+            return self._start_position
+        profile = self._profile(self.direction)
+        done = profile.elapsed(self._progress(self._start_position, self.direction))
+        progress = profile.progress(done + max(0.0, at - self.start_time))
+        return 100 * progress if self.direction > 0 else 100 * (1 - progress)
+
+    def stop(self, at) -> float:
+        """Stop the move at loop time `at` and return the final position."""
+        self._start_position = self.position(at)
+        self.direction = 0
+        return self._start_position
+
+    def travel_time(self, position, target) -> float:
+        """Return the time to move from `position` to `target`."""
+        direction = 1 if target > position else -1
+        profile = self._profile(direction)
+        return abs(
+            profile.elapsed(self._progress(target, direction))
+            - profile.elapsed(self._progress(position, direction))
+        )
+
+    def _profile(self, direction) -> TravelProfile:
+        return self._up if direction > 0 else self._down
+
+    @staticmethod
+    def _progress(position, direction) -> float:
+        return position / 100 if direction > 0 else 1 - position / 100
+
+
+class PositionPublisher:
+    """Publish the state of moving covers, rate limited and with a single timer.
+
+    Idle covers are not published at all.
+    """
+
+    def __init__(self, hass: HomeAssistant, interval) -> None:
+        """Initialize the publisher, an interval of 0 disables it."""
+        self._hass = hass
+        self._interval = interval
+        self._entities: set[Entity] = set()
+        self._handle = None
+
+    @callback
+    def async_add(self, entity: Entity) -> None:
+        """Publish `entity` until it is removed."""
+        if not self._interval:
+            return
+        self._entities.add(entity)
+        if self._handle is None:
+            self._handle = self._hass.loop.call_later(self._interval, self._tick)
+
+    @callback
+    def async_remove(self, entity: Entity) -> None:
+        """Stop publishing `entity`."""
+        self._entities.discard(entity)
+
+    @callback
+    def _tick(self) -> None:
+        self._handle = None
+        for entity in self._entities:
+            entity.async_write_ha_state()
+        if self._entities:
+            self._handle = self._hass.loop.call_later(self._interval, self._tick)
@@ -0,0 +1,136 @@
+"""Routing of the frames of covers to one of several CUL devices."""
+
+import asyncio
+from functools import partial
+import itertools
+import logging
+
+from .cul import COMMAND_EXPIRY, FRAME_MOVE, Cul, CulUnavailable, Priority
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CulPool:
+    """All CUL devices of the integration, by name in configuration order."""
+
+    def __init__(self, culs: dict[str, Cul]) -> None:
+        """Initialize the pool."""
+        self.culs = culs
+        # Shared by all round-robin routes, so a scene spreads over the devices
+        self._turn = itertools.count()
+
+    def __iter__(self):
+        """Iterate over the devices."""
+        return iter(self.culs.values())
+
+    def __len__(self) -> int:
+        """Return the number of devices."""
+        return len(self.culs)
+
+    def route(self, names=None, round_robin=False) -> "CulRoute":
+        """Return the route of a cover over the devices `names`, default all.
+
+        The first device is the primary one, the others are used if it is not
+        connected or fails. With `round_robin` every move starts on the next
+        device in turn. Raises ValueError for an unknown device.
+        """
+        if not names:
+            names = list(self.culs)
+        if not names:
+            raise ValueError("no CUL device available")
+        if unknown := [name for name in names if name not in self.culs]:
+            raise ValueError(f"unknown CUL device {', '.join(unknown)}")
+        return CulRoute(
+            [self.culs[name] for name in names], self._turn if round_robin else None
+        )
+
+
+class CulRoute:
+    """The CUL devices a cover sends with.
+
+    Offers the part of the `Cul` interface used by covers. All frames of a
+    move (start and stop) go through the device chosen by `select` when the
+    move begins, unless that device fails.
+    """
+
+    def __init__(self, culs: list[Cul], turn=None) -> None:
+        """Initialize the route over `culs`, rotated by `turn` if given."""
+        self._culs = culs
+        self._turn = turn
+        self.cul = culs[0]
+
+    @property
+    def scheduler(self):
+        """Return the stop scheduler of the current device."""
+        return self.cul.scheduler
+
+    @property
+    def tx_latency(self) -> float:
+        """Return the TX latency of the current device."""
+        return self.cul.tx_latency
+
+    @property
+    def metrics(self):
+        """Return the metrics of the current device."""
+        return self.cul.metrics
+
+    def airtime_of(self, frame_class, repetitions=None) -> float:
+        """Return the airtime of a frame of `frame_class` on the current device."""
+        return self.cul.airtime_of(frame_class, repetitions)
+
+    def select(self) -> Cul:
+        """Choose the device for the next move, preferring connected ones."""
+        culs = self._culs
+        if self._turn is not None:
+            start = next(self._turn) % len(culs)
+            culs = culs[start:] + culs[:start]
+        self.cul = next((cul for cul in culs if cul.connected), culs[0])
+        return self.cul
+
+    async def async_send_command(
+        self,
+        command_string,
+        priority=Priority.NORMAL,
+        deadline=None,
+        source=None,
+        on_sent=None,
+        frame_class=FRAME_MOVE,
+        repetitions=None,
+    ) -> float | None:
+        """Send with the current device, or with the next connected one if it fails.
+
+        Only a device that is not connected or fails to write the frame is
+        skipped, a frame that expired or was replaced is not sent again. A
+        frame keeps its expiry when it is sent with another device. If no
+        device is connected, it waits for the current one.
+        """
+        loop = asyncio.get_running_loop()
+        expires_at = loop.time() + COMMAND_EXPIRY
+        send = partial(
+            Cul.async_send_command,
+            command_string=command_string,
+            priority=priority,
+            deadline=deadline,
+            source=source,
+            on_sent=on_sent,
+            frame_class=frame_class,
+            repetitions=repetitions,
+        )
+        current = self.cul
+        if len(self._culs) > 1:
+            for cul in (current, *(cul for cul in self._culs if cul is not current)):
+                if cul is not current:
+                    if not cul.connected:
+                        continue
+                    _LOGGER.warning(
+                        "Sending with %s failed, using %s", self.cul.name, cul.name
+                    )
+                    self.cul = cul
+                try:
+                    return await send(
+                        cul, expires_in=expires_at - loop.time(), failover=True
+                    )
+                except CulUnavailable:
+                    pass
+            self.cul = current
+        return await send(current, expires_in=expires_at - loop.time())
@@ -0,0 +1,126 @@
+"""Airtime aware planning of positioning moves for the Somfy CUL integration."""
+
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+# Airtime of a single Somfy RTS frame including the culfw repetitions
+FRAME_AIRTIME = 0.14
+# Maximum time the start frame of a positioning move may be delayed
+MAX_START_SHIFT = 1.0
+
+
+class MovePlan:
+    """Planned start and stop transmission of a positioning move."""
+
+    __slots__ = ("expected_error", "start_at", "stop_at")
+
+    def __init__(self, start_at, stop_at, expected_error) -> None:
+        """Initialize the plan."""
+        self.start_at = start_at
+        self.stop_at = stop_at
+        self.expected_error = expected_error
+
+
+class StopScheduler:
+    """Plan the start and stop frames of concurrent positioning moves.
+
+    The RF channel is modelled as reserved airtime slots, one per planned
+    frame, each as long as the airtime of its frame. A new move gets the
+    earliest start time at which neither its start frame nor its stop frame
+    collides with a reserved slot. If that would delay the start by more
+    than `max_shift`, the start frame takes the first free slot and the stop
+    frame the next free slot after its deadline; the resulting overshoot is
+    reported as expected position error.
+
+    Moves are planned first come, first served, not earliest deadline
+    first: a move keeps its slots once planned, its start frame may already
+    be on air. A move planned later with an earlier deadline cannot take
+    over these slots, its start is shifted or its stop frame is late
+    instead. Only the TX queue of the CUL sends the stop frames that are due
+    earliest deadline first.
+    """
+
+    def __init__(self, airtime=FRAME_AIRTIME, max_shift=MAX_START_SHIFT) -> None:
+        """Initialize the scheduler."""
+        self.airtime = airtime
+        self.max_shift = max_shift
+        # Busy intervals of the start and stop frame of each move
+        self._slots: dict[str, tuple[tuple[float, float], tuple[float, float]]] = {}
+
+    def plan(
+        self,
+        key,
+        now,
+        time_to_stop,
+        travel_time,
+        start_airtime=None,
+        stop_airtime=None,
+    ) -> MovePlan:
+        """Plan a move of `time_to_stop` seconds starting at `now` or later.
+
+        `travel_time` is the time for a full 0..100 move, it is used to convert
+        a late stop frame into a position error in percent. The start and the
+        stop frame take `start_airtime` and `stop_airtime`, by default the
+        airtime of the scheduler.
+        """
+        self.release(key)
+        self._expire(now)
+        start_airtime = start_airtime or self.airtime
+        stop_airtime = stop_airtime or self.airtime
+
+        busy = sorted(slot for slots in self._slots.values() for slot in slots)
+
+        # Candidate start times: now, or right after a busy slot ends with either
+        # the start frame or the stop frame.
+        candidates = {now}
+        for begin, end in busy:
+            candidates.add(end)
+            candidates.add(end - time_to_stop)
+        for start in sorted(c for c in candidates if now <= c <= now + self.max_shift):
+            stop = start + time_to_stop
+            if self._is_free(busy, start, start_airtime) and self._is_free(
+                busy, stop, stop_airtime
+            ):
+                self._reserve(key, start, start_airtime, stop, stop_airtime)
+                return MovePlan(start, stop, 0.0)
+
+        # No collision free plan: start as soon as possible and send the stop
+        # frame late
+        start = self._first_free(busy, now, start_airtime)
+        busy.append((start, start + start_airtime))
+        stop = self._first_free(busy, start + time_to_stop, stop_airtime)
+        lateness = stop - (start + time_to_stop)
+        error = 100 * lateness / travel_time if travel_time else 0.0
+        _LOGGER.debug(
+            "Stop frame for %s will be %.3f s late, expected position error %.1f%%",
+            key,
+            lateness,
+            error,
+        )
+        self._reserve(key, start, start_airtime, stop, stop_airtime)
+        return MovePlan(start, stop, error)
+
+    def release(self, key) -> None:
+        """Forget the slots reserved for `key`."""
+        self._slots.pop(key, None)
+
+    def _reserve(self, key, start, start_airtime, stop, stop_airtime) -> None:
+        """Reserve the slots of the start and the stop frame of `key`."""
+        self._slots[key] = ((start, start + start_airtime), (stop, stop + stop_airtime))
+
+    def _is_free(self, busy, start, airtime) -> bool:
+        """Return True if a frame of `airtime` starting at `start` does not collide."""
+        end = start + airtime
+        return all(end <= begin or start >= stop for begin, stop in busy)
+
+    def _first_free(self, busy, at, airtime) -> float:
+        """Return the earliest time from `at` a frame of `airtime` does not collide."""
+        while not self._is_free(busy, at, airtime):
+            at = min(stop for begin, stop in busy if at < stop and begin < at + airtime)
+        return at
+
+    def _expire(self, now) -> None:
+        """Drop plans whose stop frame has already been sent."""
+        for key in [k for k, (_, (_, end)) in self._slots.items() if end < now]:
+            del self._slots[key]
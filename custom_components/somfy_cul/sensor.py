@@ -0,0 +1,197 @@
+"""Diagnostic sensors with the runtime metrics of the Somfy CUL integration."""
+
+import asyncio
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any
+
+from homeassistant.components.sensor import (
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.const import EntityCategory, UnitOfInformation, UnitOfTime
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
+
+from .const import DATA_METRICS, DATA_SOMFY_CUL, DOMAIN
+from .metrics import Histogram, Metrics
+from .router import CulPool
+
+SCAN_INTERVAL = timedelta(seconds=30)
+
+
+@dataclass(frozen=True, kw_only=True)
+class SomfyCulSensorEntityDescription(SensorEntityDescription):
+    """Describes a metrics sensor."""
+
+    value_fn: Callable[[Metrics, CulPool], Any]
+    histogram_fn: Callable[[Metrics], Histogram] | None = None
+
+
+def _mean_ms(histogram_fn):
+    """Return a value function with the mean of a timing histogram in ms."""
+
+    def value_fn(metrics: Metrics, pool: CulPool):
+        mean = histogram_fn(metrics).mean
+        return None if mean is None else round(mean * 1000, 3)
+
+    return value_fn
+
+
+def _airtime_credit(metrics: Metrics, pool: CulPool) -> float:
+    """Return the lowest airtime credit of the devices in seconds."""
+    now = asyncio.get_running_loop().time()
+    return round(min(cul.governor.credit(now) for cul in pool), 1)
+
+
+SENSORS: tuple[SomfyCulSensorEntityDescription, ...] = (
+    SomfyCulSensorEntityDescription(
+        key="queue_depth",
+        name="TX queue depth",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics, pool: sum(cul.queue_depth for cul in pool),
+    ),
+    SomfyCulSensorEntityDescription(
+        key="airtime_credit",
+        name="Airtime credit",
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=_airtime_credit,
+    ),
+    SomfyCulSensorEntityDescription(
+        key="frames_deferred",
+        name="Frames deferred",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics, pool: sum(cul.governor.deferred for cul in pool),
+    ),
+    SomfyCulSensorEntityDescription(
+        key="frames_merged",
+        name="Frames merged",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics, pool: sum(cul.governor.merged for cul in pool),
+    ),
+    SomfyCulSensorEntityDescription(
+        key="frames_sent",
+        name="Frames sent",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics, pool: metrics.frames_sent,
+    ),
+    SomfyCulSensorEntityDescription(
+        key="frames_failed",
+        name="Frames failed",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics, pool: metrics.frames_failed,
+    ),
+    SomfyCulSensorEntityDescription(
+        key="frames_expired",
+        name="Frames expired",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics, pool: metrics.frames_expired,
+    ),
+    SomfyCulSensorEntityDescription(
+        key="frames_received",
+        name="Frames received",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics, pool: metrics.frames_received,
+    ),
+    SomfyCulSensorEntityDescription(
+        key="serial_write",
+        name="Serial write time",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=_mean_ms(lambda metrics: metrics.serial_write),
+        histogram_fn=lambda metrics: metrics.serial_write,
+    ),
+    SomfyCulSensorEntityDescription(
+        key="tx_wait",
+        name="TX wait time",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=_mean_ms(lambda metrics: metrics.tx_wait),
+        histogram_fn=lambda metrics: metrics.tx_wait,
+    ),
+    SomfyCulSensorEntityDescription(
+        key="save_duration",
+        name="State file write time",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=_mean_ms(lambda metrics: metrics.save_duration),
+        histogram_fn=lambda metrics: metrics.save_duration,
+    ),
+    SomfyCulSensorEntityDescription(
+        key="save_bytes",
+        name="State file size",
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics, pool: metrics.save_bytes.mean,
+        histogram_fn=lambda metrics: metrics.save_bytes,
+    ),
+    SomfyCulSensorEntityDescription(
+        key="stop_lateness",
+        name="Stop frame lateness",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=_mean_ms(lambda metrics: metrics.stop_lateness),
+        histogram_fn=lambda metrics: metrics.stop_lateness,
+    ),
+)
+
+
+async def async_setup_platform(
+    hass: HomeAssistant,
+    config: ConfigType,
+    async_add_entities: AddEntitiesCallback,
+    discovery_info: DiscoveryInfoType | None = None,
+) -> None:
+    """Set up the metrics sensors, if metrics are enabled."""
+    somfy_cul_data = hass.data.get(DOMAIN, {})
+    metrics = somfy_cul_data.get(DATA_METRICS)
+    if metrics is None:
+        return
+
+    pool = somfy_cul_data[DATA_SOMFY_CUL]
+    async_add_entities(
+        SomfyCulMetricsSensor(metrics, pool, description) for description in SENSORS
+    )
+
+
+class SomfyCulMetricsSensor(SensorEntity):
+    """A runtime metric of the CUL device, polled every SCAN_INTERVAL."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_has_entity_name = True
+    _unrecorded_attributes = frozenset({"buckets", "sum"})
+
+    entity_description: SomfyCulSensorEntityDescription
+
+    def __init__(
+        self,
+        metrics: Metrics,
+        pool: CulPool,
+        description: SomfyCulSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        self.entity_description = description
+        self._metrics = metrics
+        self._pool = pool
+        self._attr_unique_id = f"{DOMAIN}_{description.key}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, "cul")},
+            name="Somfy CUL",
+        )
+
+    @property
+    def native_value(self) -> Any:
+        """Return the current value of the metric."""
+        return self.entity_description.value_fn(self._metrics, self._pool)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return count, maximum and buckets of a histogram."""
+        if self.entity_description.histogram_fn is None:
+            return None
+        return self.entity_description.histogram_fn(self._metrics).as_dict()
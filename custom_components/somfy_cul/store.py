@@ -0,0 +1,212 @@
+"""Persistence of the cover state (rolling codes, encryption keys, positions)."""
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+
+import yaml
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import CONF_ADDRESS
+from .metrics import Metrics
+
+_LOGGER = logging.getLogger(__name__)
+
+try:
+    _YamlDumper = yaml.CSafeDumper
+    _YamlLoader = yaml.CSafeLoader
+except AttributeError:  # PyYAML built without libyaml
+    _YamlDumper = yaml.SafeDumper
+    _YamlLoader = yaml.SafeLoader
+
+FORMAT_YAML = "yaml"
+FORMAT_JSON = "json"
+
+# Time to wait for further changes before the state file is written
+SAVE_DELAY = 1.0
+
+
+class SomfyStateStore:
+    """Write-behind store for the state file of all covers.
+
+    The file is read once and held in memory, indexed by entity_id and by
+    the address of the cover. Changes mark an entity dirty
+    and are written together, at most once per `delay` seconds, by
+    atomically replacing the file (temp file + fsync + rename) from an
+    executor thread. YAML is written with libyaml when available, JSON is
+    offered as a faster alternative that is still readable.
+
+    The duration and size of the writes are collected into `metrics`, if set.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, path: str, fmt=FORMAT_YAML, delay=SAVE_DELAY
+    ) -> None:
+        """Initialize the store for the state file at `path` (without suffix)."""
+        self._hass = hass
+        self._format = fmt
+        self._path = f"{path}.{fmt}"
+        self._legacy_path = f"{path}.{FORMAT_YAML}"
+        self._delay = delay
+
+        self._data: dict[str, dict] = {}
+        self._by_address: dict[str, str] = {}
+        self._dirty: set[str] = set()
+        self._mtime: float | None = None
+        self._load_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self.metrics: Metrics | None = None
+
+    @property
+    def path(self) -> str:
+        """Return the path of the state file."""
+        return self._path
+
+    def get(self, key: str, address: str | None = None) -> dict | None:
+        """Return the stored state of entity `key`, or of the cover with `address`."""
+        state = self._data.get(key)
+        if state is None and (other := self._by_address.get(address)) is not None:
+            state = self._data.get(other)
+        return state
+
+    def load(self) -> None:
+        """Read the state file. Must be run in an executor thread."""
+        self._data, self._mtime = self._read()
+        self._reindex()
+
+    async def async_reload(self) -> bool:
+        """Re-read the state file if it was modified since it was read or written.
+
+        Entities changed since the last write keep their in-memory state.
+        Returns True if the file was parsed again.
+        """
+        async with self._load_lock:
+            mtime = await self._hass.async_add_executor_job(self._get_mtime)
+            if mtime == self._mtime:
+                return False
+            data, self._mtime = await self._hass.async_add_executor_job(self._read)
+            for key in self._dirty:
+                if key in self._data:
+                    data[key] = self._data[key]
+                else:
+                    data.pop(key, None)
+            self._data = data
+            self._reindex()
+        return True
+
+    def _reindex(self) -> None:
+        self._by_address = {
+            state[CONF_ADDRESS]: key
+            for key, state in self._data.items()
+            if isinstance(state, dict) and CONF_ADDRESS in state
+        }
+
+    @callback
+    def async_set(self, key: str, state: dict) -> None:
+        """Update the state of `key` and schedule a write of the file."""
+        if self._data.get(key) == state:
+            return
+        if (address := state.get(CONF_ADDRESS)) is not None:
+            # Drop the entry of a renamed entity, the address is the identity
+            if (old_key := self._by_address.get(address, key)) != key:
+                self._data.pop(old_key, None)
+                self._dirty.add(old_key)
+            self._by_address[address] = key
+        self._data[key] = state
+        self._dirty.add(key)
+        if self._flush_handle is None:
+            self._flush_handle = self._hass.loop.call_later(
+                self._delay, self._async_schedule_flush
+            )
+
+    @callback
+    def _async_schedule_flush(self) -> None:
+        self._flush_handle = None
+        self._hass.async_create_task(self.async_flush())
+
+    async def async_flush(self, *_) -> bool:
+        """Write all pending changes to the state file.
+
+        Returns False if the write failed, the changes stay pending for the
+        next write then.
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        async with self._write_lock:
+            # Checked under the lock, so a write in progress is waited for
+            if not self._dirty:
+                return True
+            # Changes made during the write go into a new set
+            dirty, self._dirty = self._dirty, set()
+            _LOGGER.debug("Writing state of %s", ", ".join(sorted(dirty)))
+            metrics = self.metrics
+            if metrics is not None:
+                start = time.perf_counter()
+            try:
+                size = await self._hass.async_add_executor_job(
+                    self._write, dict(self._data)
+                )
+            except OSError as e:
+                _LOGGER.error("Error writing state file %s: %s", self._path, e)
+                # Keep the changes for the next write
+                self._dirty |= dirty
+                return False
+            if metrics is not None:
+                metrics.save_duration.observe(time.perf_counter() - start)
+                metrics.save_bytes.observe(size)
+        return True
+
+    def _dump(self, data) -> str:
+        if self._format == FORMAT_JSON:
+            return json.dumps(data, indent=2, sort_keys=True)
+        return yaml.dump(data, Dumper=_YamlDumper, default_flow_style=False)
+
+    def _get_mtime(self) -> float | None:
+        try:
+            return os.stat(self._path).st_mtime  # noqa: PTH116
+        except FileNotFoundError:
+            return None
+
+    def _read(self) -> tuple[dict, float | None]:
+        """Read the state file, falling back to a YAML file of a former format.
+
+        Returns the content and the modification time of the state file.
+        """
+        mtime = self._get_mtime()
+        for path in dict.fromkeys((self._path, self._legacy_path)):
+            try:
+                with open(path, encoding="utf-8") as file:  # noqa: PTH123
+                    if path.endswith(FORMAT_JSON):
+                        return json.load(file) or {}, mtime
+                    return yaml.load(file, Loader=_YamlLoader) or {}, mtime
+            except FileNotFoundError:
+                continue
+            except (yaml.YAMLError, ValueError) as e:
+                _LOGGER.error("Error reading state file %s: %s", path, e)
+                return {}, mtime
+        _LOGGER.debug("State file not existing: %s. Creating a new one", self._path)
+        return {}, mtime
+
+    def _write(self, data: dict) -> int:
+        """Atomically replace the state file with `data`, returns the bytes written."""
+        content = self._dump(data).encode()
+        directory = os.path.dirname(self._path)  # noqa: PTH120
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".somfy_cul_")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(content)
+                file.flush()
+                os.fsync(file.fileno())
+            os.chmod(tmp_path, 0o644)  # noqa: PTH101
+            os.replace(tmp_path, self._path)
+            self._mtime = self._get_mtime()
+        except BaseException:
+            os.unlink(tmp_path)  # noqa: PTH108
+            raise
+        return len(content)
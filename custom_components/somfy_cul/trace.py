@@ -0,0 +1,94 @@
+"""Trace of the last frames sent and received by the CUL device.
+
+Recording a frame only stores references into preallocated slots, the
+frames are decoded when the trace is dumped. This keeps tracing cheap enough
+to stay on permanently.
+
+This module has no Home Assistant dependencies.
+"""
+
+from .codec import decode_frame
+
+TX = "tx"
+RX = "rx"
+
+OUTCOME_SENT = "sent"
+OUTCOME_FAILED = "failed"
+OUTCOME_EXPIRED = "expired"
+OUTCOME_MERGED = "merged"
+OUTCOME_RECEIVED = "received"
+OUTCOME_REPEATED = "repeated"
+
+DEFAULT_TRACE_SIZE = 256
+
+
+class FrameTrace:
+    """Ring buffer of the last `size` frames."""
+
+    __slots__ = (
+        "_directions",
+        "_entities",
+        "_frames",
+        "_index",
+        "_outcomes",
+        "_times",
+        "size",
+    )
+
+    def __init__(self, size=DEFAULT_TRACE_SIZE) -> None:
+        """Allocate the slots for `size` frames."""
+        self.size = size
+        self._index = 0
+        self._times = [0.0] * size
+        self._directions: list[str | None] = [None] * size
+        self._entities: list[str | None] = [None] * size
+        self._frames: list[bytes | str | None] = [None] * size
+        self._outcomes: list[str | None] = [None] * size
+
+    def record(self, at, direction, frame, outcome, entity=None) -> None:
+        """Record `frame` (a TX line as bytes, an RX line as str, or None)."""
+        i = self._index % self.size
+        self._times[i] = at
+        self._directions[i] = direction
+        self._entities[i] = entity
+        self._frames[i] = frame
+        self._outcomes[i] = outcome
+        self._index += 1
+
+    def __len__(self) -> int:
+        """Return the number of frames in the trace."""
+        return min(self._index, self.size)
+
+    def as_list(self, entities_by_address=None) -> list[dict]:
+        """Return the frames in the trace, oldest first.
+
+        Received frames get the entities listed for their address in
+        `entities_by_address`.
+        """
+        start = self._index - len(self)
+        entries = [self._entry(i % self.size) for i in range(start, self._index)]
+        if entities_by_address:
+            for entry in entries:
+                if entry["direction"] == RX and "address" in entry:
+                    entry["entity_id"] = entities_by_address.get(entry["address"])
+        return entries
+
+    def _entry(self, i) -> dict:
+        line = self._frames[i] or ""
+        direction = self._directions[i]
+        if isinstance(line, bytes):
+            line = line.decode("ascii", "replace")
+        line = line.strip()
+        entry = {
+            "time": self._times[i],
+            "direction": direction,
+            "entity_id": self._entities[i],
+            "outcome": self._outcomes[i],
+            "frame": line,
+        }
+        if (frame := decode_frame(line, received=direction == RX)) is not None:
+            entry["address"] = frame.address
+            entry["command"] = f"{frame.command:X}0"
+            entry["rolling_code"] = frame.rolling_code
+            entry["enc_key"] = frame.enc_key
+        return entry